@@ -2,19 +2,26 @@ attachment-notfound = Please add an attachment to your message.
 
 body-too-long = Results exceeded the maximum allowed length. Please try searching with a potentially narrower set of results.
 
+drive-unavailable = Google Drive is not responding right now. Please try again in a bit.
+
 enter-folder-name = Please enter a name for the course folder:
 
+file-already-exists = A file named `{$name}` already exists in this folder.
+file-name-repeated = More than one attachment is named `{$name}`. Only the first one will be uploaded; rename the others and upload them again.
+
 files = Files
 folders = Folders
 
 folder-notfound = No folder named `{$folder}` was found. Would you like to create it?
 
-ignored = The following arguments were ignored:{"\u000a"}{$args}
-ignored-reason = Arguments must be at least 3 characters long
-
 invalid-option = The option, `{$option}`, is invalid. For valid options, please check `{$prefix}help {$command}`
 
 result-notfound = Could not find anything related to your search query.
 
 upload-cancelled = Upload cancelled.
+upload-failed = Uploading `{$name}` failed. Please try again.
 upload-successful = The file has been successfully uploaded to the following directory:
+
+ingest-index-not-ready = The Drive index is still being built. Please try again in a few minutes.
+ingest-summary = Planned {$uploads} uploads into {$folders} new folders and {$renames} renames; {$skipped} papers were skipped. The full plan is attached.
+ingest-done = Uploaded {$uploaded} papers and renamed {$renamed}. {$failed} failed.
@@ -1,3 +1,9 @@
+course-path-none = This course has no prerequisites.
+course-path-step = Step {$step}
+
+course-search-results = Courses matching “{$query}”
+course-search-notfound = No course mentions `{$query}`.
+
 invite = Invites
 
 nick-change-success = {$member}'s nick changed from `{$old}` to `{$new}` successfully.
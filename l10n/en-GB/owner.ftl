@@ -1,3 +1,18 @@
 load-successful = '{$ext}' loaded successfully!
 unload-successful = '{$ext}' unloaded successfully!
 reload-successful = '{$ext}' reloaded successfully!
+
+profile-busy = A profile is already being taken. Please wait for it to finish.
+profile-cpu-done = Collected {$samples} samples over {$seconds}s. {$idle} of them were taken while the event loop was idle and are left out of the profile. The `.folded` file can be opened with speedscope or flamegraph.pl.
+
+heap-already-tracing = Memory allocations are already being traced.
+heap-not-tracing = Memory allocations are not being traced. Use `/heap start` first.
+heap-started = Started tracing memory allocations with {$frames} frame(s) per allocation.
+heap-snapshot-taken = Snapshot `{$name}` taken. Traced memory: {$current} MiB (peak: {$peak} MiB).
+heap-snapshot-notfound = No snapshot named `{$name}` was found.
+heap-stopped = Stopped tracing memory allocations. All snapshots have been discarded.
+
+sql-refused = Only read-only statements (`SELECT`, `WITH`, `VALUES`, `TABLE`, `SHOW`, `EXPLAIN`) are allowed.
+sql-error = The query failed: `{$error}`
+sql-summary = {$rows} row(s) in {$time}ms.
+sql-truncated = Only the first {$limit} rows are shown.
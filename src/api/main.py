@@ -1,6 +1,9 @@
+import asyncio
+
 from aiohttp import web
 
 from api.club import club
+from utils import metrics
 
 
 # class API(web.Application):
@@ -41,4 +44,14 @@ async def main(request: web.Request):
     )
 
 
+@routes.get("/metrics")
+async def get_metrics(_: web.Request):
+    # Rendering is kept off the event loop; the registry is thread-safe
+    body = await asyncio.to_thread(metrics.REGISTRY.render)
+    return web.Response(
+        body=body.encode("utf-8"),
+        headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"},
+    )
+
+
 app.router.add_routes(routes)
@@ -5,11 +5,16 @@ from typing import TYPE_CHECKING, Any, Sequence
 from discord import Embed, Message
 from discord.ext.commands import Context
 
+from utils import tracing
+
 if TYPE_CHECKING:
     from main import ProjectHyperlink
 
 
 class HyperlinkContext(Context['ProjectHyperlink']):
+    trace: tracing.Trace | None = None
+
+    @tracing.traced("l10n")
     async def translate(
         self,
         content: str | None,
@@ -51,7 +56,8 @@ class HyperlinkContext(Context['ProjectHyperlink']):
             kwargs.pop("embeds", None),
             l10n_context,
         )
-        return await super().send(**items, **kwargs)
+        with tracing.span("send"):
+            return await super().send(**items, **kwargs)
 
     async def reply(
         self,
@@ -66,4 +72,5 @@ class HyperlinkContext(Context['ProjectHyperlink']):
             kwargs.pop("embeds", None),
             l10n_context,
         )
-        return await super().reply(**items, **kwargs)
+        with tracing.span("send"):
+            return await super().reply(**items, **kwargs)
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from discord import Interaction, app_commands
+
+from utils import metrics, tracing
+
+if TYPE_CHECKING:
+    from main import ProjectHyperlink
+
+
+class HyperlinkTree(app_commands.CommandTree["ProjectHyperlink"]):
+    """The command tree for all ProjectHyperlink app commands."""
+
+    async def _call(self, interaction: Interaction[ProjectHyperlink]) -> None:
+        # The command is only resolved inside `_call`, so the trace is renamed after
+        with tracing.start("/unknown") as trace:
+            interaction.extras["trace"] = trace
+            try:
+                await super()._call(interaction)
+            finally:
+                command = interaction.command
+                name = command.qualified_name if command else "unknown"
+                trace.name = f"/{name}"
+                metrics.APP_COMMAND_LATENCY.labels(
+                    name, "failed" if interaction.command_failed else "ok"
+                ).observe(trace.duration)
+
+        tracing.report_if_slow(trace, interaction.user)
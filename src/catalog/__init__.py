@@ -0,0 +1,14 @@
+from .bm25 import BM25Index
+from .catalog import CourseCatalog, course_text, normalize_code, parse_course
+from .graph import PrerequisiteGraph
+from .trie import PrefixTrie
+
+__all__ = (
+    "BM25Index",
+    "CourseCatalog",
+    "PrerequisiteGraph",
+    "PrefixTrie",
+    "course_text",
+    "normalize_code",
+    "parse_course",
+)
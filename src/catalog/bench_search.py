@@ -0,0 +1,126 @@
+"""Benchmark full-text course search on the whole catalog.
+
+    cd src && python -m catalog.bench_search [--snapshot cache/courses.json.gz]
+
+Without a snapshot, a synthetic catalog the size of NITKKR's (every branch,
+every semester) is generated, with course text drawn from a shared vocabulary
+so that common words are as common as they are in the real syllabi.
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from catalog import CourseCatalog
+from models.courses import Course, Specifics
+
+BRANCHES = ["CE", "CS", "EC", "EE", "IT", "ME", "PI"]
+TOPICS = [
+    "algorithms", "analysis", "circuits", "complexity", "compilers", "control",
+    "data", "databases", "design", "digital", "discrete", "dynamics", "electronics",
+    "energy", "fluid", "graphs", "heat", "learning", "machines", "management",
+    "materials", "mathematics", "mechanics", "microprocessors", "networks",
+    "operating", "optimization", "power", "probability", "programming", "signals",
+    "software", "statistics", "structures", "systems", "thermodynamics", "transforms",
+]
+FILLER = [
+    "the", "of", "and", "to", "in", "students", "will", "be", "able", "understand",
+    "basic", "concepts", "apply", "methods", "introduction", "principles", "study",
+]
+
+QUERIES = [
+    "fourier transforms",
+    "graph algorithms",
+    "thermodynamics heat",
+    "operating systems scheduling",
+    "probability statistics",
+    "CS201",
+    "microprocessors",
+    "fluid mechanics design",
+]
+
+
+def sentence(rng: random.Random, words: int) -> str:
+    vocabulary = TOPICS + FILLER * 3
+    return " ".join(rng.choice(vocabulary) for _ in range(words)).capitalize() + "."
+
+
+def generate(seed: int = 0) -> list[Course]:
+    rng = random.Random(seed)
+    courses = []
+    for branch in BRANCHES:
+        for semester in range(1, 9):
+            for number in range(1, 9):
+                code = f"{branch}{semester}{number:02d}"
+                courses.append(
+                    Course(
+                        code=code,
+                        title=" ".join(rng.sample(TOPICS, 3)).title(),
+                        prereq=[],
+                        kind=rng.choice(["Core", "Elective", "Lab"]),
+                        objectives=[sentence(rng, 15) for _ in range(4)],
+                        content=[sentence(rng, 60) for _ in range(5)],
+                        book_names=[sentence(rng, 6) for _ in range(3)],
+                        outcomes=[sentence(rng, 15) for _ in range(4)],
+                        specifics=[Specifics(branch, semester, [3, 1, 0])],
+                    )
+                )
+    return courses
+
+
+def percentile(samples: list[float], fraction: float) -> float:
+    return sorted(samples)[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--snapshot", help="a course catalog snapshot to search")
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    catalog = CourseCatalog(None, args.snapshot or "")  # type: ignore
+    if args.snapshot:
+        courses = catalog._read_snapshot()
+    else:
+        courses = generate()
+
+    start = time.perf_counter()
+    catalog.update(courses)
+    build = time.perf_counter() - start
+    print(f"Indexed {len(catalog)} courses in {build * 1000:.1f}ms")
+
+    # A refresh where a tenth of the catalog changed
+    changed = [
+        Course(**{**vars(course), "title": course.title + " II"})
+        for course in courses[::10]
+    ]
+    unchanged = [course for i, course in enumerate(courses) if i % 10]
+    start = time.perf_counter()
+    catalog.update([*changed, *unchanged])
+    refresh = time.perf_counter() - start
+    print(f"Re-indexed {len(changed)} changed courses in {refresh * 1000:.1f}ms\n")
+
+    all_timings = []
+    print(f"{'query':<32}{'p50':>9}{'p99':>9}{'hits':>6}  top hit")
+    for query in QUERIES:
+        timings = []
+        for _ in range(args.rounds):
+            start = time.perf_counter()
+            results = catalog.search(query)
+            timings.append(time.perf_counter() - start)
+        all_timings.extend(timings)
+
+        top = f"{results[0].code} {results[0].title}" if results else "-"
+        print(
+            f"{query:<32}"
+            f"{percentile(timings, 0.5) * 1000:>7.3f}ms"
+            f"{percentile(timings, 0.99) * 1000:>7.3f}ms"
+            f"{len(results):>6}  {top}"
+        )
+
+    print(f"\nMean over all queries: {statistics.mean(all_timings) * 1000:.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import heapq
+import math
+from collections import Counter
+from operator import itemgetter
+from typing import Generic, Hashable, Iterable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+
+
+class BM25Index(Generic[K]):
+    """An inverted index over token lists, ranked with Okapi BM25.
+
+    Documents can be added and removed one at a time; the collection
+    statistics BM25 depends on are kept up to date as they are.
+    """
+
+    def __init__(self, *, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: dict[str, dict[K, int]] = {}
+        self._lengths: dict[K, int] = {}
+        self._terms: dict[K, list[str]] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def add(self, key: K, tokens: Iterable[str]) -> None:
+        if key in self._lengths:
+            self.remove(key)
+
+        counts = Counter(tokens)
+        for token, count in counts.items():
+            self._postings.setdefault(token, {})[key] = count
+        self._terms[key] = list(counts)
+        self._lengths[key] = length = sum(counts.values())
+        self._total_length += length
+
+    def remove(self, key: K) -> None:
+        if (length := self._lengths.pop(key, None)) is None:
+            return
+        self._total_length -= length
+        for token in self._terms.pop(key):
+            del self._postings[token][key]
+            if not self._postings[token]:
+                del self._postings[token]
+
+    def search(self, tokens: Iterable[str], limit: int = 25) -> list[tuple[K, float]]:
+        """Return the `limit` best matching keys with their scores"""
+        if not self._lengths:
+            return []
+
+        count = len(self._lengths)
+        average_length = self._total_length / count
+        scores: Counter[K] = Counter()
+        for token in set(tokens):
+            if (postings := self._postings.get(token)) is None:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for key, frequency in postings.items():
+                norm = 1 - self.b + self.b * self._lengths[key] / average_length
+                scores[key] += (
+                    idf * frequency * (self.k1 + 1) / (frequency + self.k1 * norm)
+                )
+        return heapq.nlargest(limit, scores.items(), key=itemgetter(1))
@@ -0,0 +1,184 @@
+"""A local mirror of the course catalog on Breadboard.
+
+The catalog is fetched whole and diffed against the courses already held, so
+only the courses that changed are re-indexed: in a prefix trie over codes and
+titles for autocomplete, and in a BM25 index over all of a course's text for
+full-text search. The prerequisite graph is rebuilt only when a refresh
+changes some course's prerequisites. The last catalog fetched is kept
+in a gzipped JSON snapshot, which is what a restart starts from until the
+first refresh completes.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import logging
+import os
+import pathlib
+import re
+from typing import Any
+
+import aiohttp
+
+import config
+from models.courses import Course, Specifics
+from utils import snapshot
+from utils.search import tokenize
+
+from .bm25 import BM25Index
+from .graph import PrerequisiteGraph
+from .trie import PrefixTrie
+
+logger = logging.getLogger("ProjectHyperlink")
+
+SNAPSHOT_VERSION = 1
+# Titles count this many times over in full-text search
+TITLE_WEIGHT = 3
+
+_NOT_ALPHANUMERIC = re.compile(r"[^a-z0-9]")
+
+
+def normalize_code(code: str) -> str:
+    """`CS-201`, `cs 201` and `CS201` are all `cs201`"""
+    return _NOT_ALPHANUMERIC.sub("", code.casefold())
+
+
+def parse_course(data: dict[str, Any]) -> Course:
+    data = dict(data)
+    specifics = [Specifics(**specific) for specific in data.pop("specifics")]
+    return Course(**data, specifics=specifics)
+
+
+def course_text(course: Course) -> list[str]:
+    """Every line of text in a course other than its title"""
+    return [*course.objectives, *course.content, *course.outcomes, *course.book_names]
+
+
+def _text_tokens(course: Course) -> list[str]:
+    tokens = [normalize_code(course.code), *tokenize(course.title) * TITLE_WEIGHT]
+    for line in course_text(course):
+        tokens.extend(tokenize(line))
+    return tokens
+
+
+class CourseCatalog:
+    def __init__(
+        self, session: aiohttp.ClientSession, snapshot_path: str | os.PathLike
+    ):
+        self.session = session
+        self.snapshot_path = pathlib.Path(snapshot_path)
+        self.courses: dict[str, Course] = {}
+        self.ready = asyncio.Event()
+        self._codes: dict[str, str] = {}
+        self._trie: PrefixTrie[str] = PrefixTrie()
+        self._text: BM25Index[str] = BM25Index()
+        self.graph = PrerequisiteGraph()
+
+    def __len__(self) -> int:
+        return len(self.courses)
+
+    def get(self, code: str) -> Course | None:
+        if (course := self.courses.get(code)) is not None:
+            return course
+        if (key := self._codes.get(normalize_code(code))) is not None:
+            return self.courses[key]
+        return None
+
+    def complete(self, query: str, limit: int = 25) -> list[Course]:
+        """Return the courses whose code or title words start with the query's"""
+        code = normalize_code(query)
+        if not code:
+            return [self.courses[key] for key in sorted(self.courses)[:limit]]
+
+        by_code = self._trie.find(code)
+        matches = by_code | self._trie.match(tokenize(query))
+        # Courses whose code matches come first, then by code
+        ranked = sorted(matches, key=lambda key: (key not in by_code, key))
+        return [self.courses[key] for key in ranked[:limit]]
+
+    def search(self, query: str, limit: int = 50) -> list[Course]:
+        """Return the courses whose text best matches the query"""
+        tokens = tokenize(query)
+        if code := self._codes.get(normalize_code(query)):
+            tokens.append(normalize_code(code))
+        return [self.courses[key] for key, _ in self._text.search(tokens, limit)]
+
+    def update(self, courses: list[Course]) -> tuple[set[str], set[str]]:
+        """Replace the catalog, and return the codes that changed and were removed"""
+        fetched = {course.code: course for course in courses}
+        removed = self.courses.keys() - fetched.keys()
+        changed = {
+            code
+            for code, course in fetched.items()
+            if self.courses.get(code) != course
+        }
+        rewired = bool(removed) or any(
+            (old := self.courses.get(code)) is None or old.prereq != fetched[code].prereq
+            for code in changed
+        )
+
+        for code in removed:
+            del self.courses[code]
+            del self._codes[normalize_code(code)]
+            self._trie.remove(code)
+            self._text.remove(code)
+        for code in changed:
+            course = self.courses[code] = fetched[code]
+            self._codes[normalize_code(code)] = code
+            tokens = [normalize_code(code), *tokenize(code), *tokenize(course.title)]
+            self._trie.add(code, tokens)
+            self._text.add(code, _text_tokens(course))
+
+        if rewired:
+            self._build_graph()
+        if self.courses:
+            self.ready.set()
+        return changed, removed
+
+    def _build_graph(self) -> None:
+        # Prerequisites are matched to courses however their codes are written
+        self.graph.build(
+            {
+                code: [self._codes.get(normalize_code(p), p) for p in course.prereq]
+                for code, course in self.courses.items()
+            }
+        )
+        for cycle in self.graph.cycles:
+            logger.warning(f"Courses require each other: {', '.join(cycle)}")
+
+    def _read_snapshot(self) -> list[Course]:
+        data = snapshot.read(self.snapshot_path)
+        if data["version"] != SNAPSHOT_VERSION:
+            return []
+        return [parse_course(course) for course in data["courses"]]
+
+    async def load_snapshot(self) -> bool:
+        """Load the last catalog saved, and return whether there was one"""
+        try:
+            courses = await asyncio.to_thread(self._read_snapshot)
+            self.update(courses)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError, KeyError, TypeError) as error:
+            logger.warning(f"Ignoring unreadable course catalog snapshot: {error!r}")
+            return False
+        return bool(courses)
+
+    async def refresh(self) -> tuple[set[str], set[str]]:
+        """Fetch the catalog, and return the codes that changed and were removed"""
+        async with self.session.get(f"{config.API_URL}/courses") as resp:
+            resp.raise_for_status()
+            data = (await resp.json())["data"]
+
+        changed, removed = self.update([parse_course(course) for course in data])
+        if changed or removed:
+            data = {
+                "version": SNAPSHOT_VERSION,
+                "courses": [dataclasses.asdict(c) for c in self.courses.values()],
+            }
+            try:
+                await asyncio.to_thread(snapshot.write, self.snapshot_path, data)
+            except OSError as error:
+                logger.warning(f"Saving a course catalog snapshot failed: {error}")
+        return changed, removed
@@ -0,0 +1,96 @@
+"""The prerequisite graph of the course catalog.
+
+Everything `/course path` shows is worked out when the graph is built: every
+course's transitive prerequisites, and its level, the length of the longest
+chain of prerequisites below it. Courses are visited as the strongly connected
+components of the graph, found with Tarjan's algorithm, which both orders them
+prerequisites first and surfaces cycles (which the catalog should never have,
+but would otherwise hang a naive traversal).
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, Mapping
+
+
+class PrerequisiteGraph:
+    def __init__(self):
+        self.prereqs: dict[str, tuple[str, ...]] = {}
+        # Every course, each after all of its prerequisites
+        self.order: list[str] = []
+        self.closure: dict[str, frozenset[str]] = {}
+        self.levels: dict[str, int] = {}
+        self.cycles: list[list[str]] = []
+
+    def _components(self) -> list[list[str]]:
+        """Return the strongly connected components, prerequisites first"""
+        index: dict[str, int] = {}
+        low: dict[str, int] = {}
+        stack: list[str] = []
+        on_stack: set[str] = set()
+        components: list[list[str]] = []
+
+        def visit(code: str) -> None:
+            index[code] = low[code] = len(index)
+            stack.append(code)
+            on_stack.add(code)
+            for prereq in self.prereqs.get(code, ()):
+                if prereq not in index:
+                    visit(prereq)
+                    low[code] = min(low[code], low[prereq])
+                elif prereq in on_stack:
+                    low[code] = min(low[code], index[prereq])
+
+            if low[code] == index[code]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == code:
+                        break
+                components.append(component)
+
+        for code in self.prereqs:
+            if code not in index:
+                visit(code)
+        return components
+
+    def build(self, prereqs: Mapping[str, Iterable[str]]) -> None:
+        """Rebuild the graph from the prerequisites of every course"""
+        self.prereqs = {code: tuple(dict.fromkeys(p)) for code, p in prereqs.items()}
+        self.order = []
+        self.closure = {}
+        self.levels = {}
+        self.cycles = []
+
+        for component in self._components():
+            members = set(component)
+            cyclic = len(component) > 1 or component[0] in self.prereqs.get(
+                component[0], ()
+            )
+            if cyclic:
+                self.cycles.append(sorted(component))
+
+            below: set[str] = set(members) if cyclic else set()
+            level = 0
+            for code in component:
+                for prereq in self.prereqs.get(code, ()):
+                    if prereq in members:
+                        continue
+                    below.add(prereq)
+                    below |= self.closure[prereq]
+                    level = max(level, self.levels[prereq] + 1)
+
+            closure = frozenset(below)
+            for code in sorted(component):
+                self.order.append(code)
+                self.closure[code] = closure
+                self.levels[code] = level
+
+    def path(self, code: str) -> list[list[str]]:
+        """Return everything needed before a course, a level at a time"""
+        levels: dict[int, list[str]] = {}
+        for prereq in sorted(self.closure.get(code, ()) - {code}):
+            levels.setdefault(self.levels[prereq], []).append(prereq)
+        return [levels[level] for level in sorted(levels)]
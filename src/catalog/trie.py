@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+from typing import Generic, Hashable, Iterable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+
+
+class _Node(Generic[K]):
+    __slots__ = ("children", "keys")
+
+    def __init__(self):
+        self.children: dict[str, _Node[K]] = {}
+        # Every key with a token that starts with the prefix this node spells
+        self.keys: set[K] = set()
+
+
+class PrefixTrie(Generic[K]):
+    """Maps token prefixes to the keys that have a token starting with them.
+
+    Every node keeps the full set of keys below it, so a lookup costs one step
+    per character of the prefix, however many keys match.
+    """
+
+    def __init__(self):
+        self._root: _Node[K] = _Node()
+        self._tokens: dict[K, set[str]] = {}
+
+    def __contains__(self, key: K) -> bool:
+        return key in self._tokens
+
+    def add(self, key: K, tokens: Iterable[str]) -> None:
+        if key in self._tokens:
+            self.remove(key)
+
+        self._tokens[key] = set(tokens)
+        for token in self._tokens[key]:
+            node = self._root
+            for char in token:
+                node = node.children.setdefault(char, _Node())
+                node.keys.add(key)
+
+    def remove(self, key: K) -> None:
+        for token in self._tokens.pop(key, ()):
+            parent = self._root
+            for char in token:
+                if (node := parent.children.get(char)) is None:
+                    # Pruned along with another token of the same key
+                    break
+                node.keys.discard(key)
+                if not node.keys:
+                    # Nothing passes through this branch anymore
+                    del parent.children[char]
+                    break
+                parent = node
+
+    def find(self, prefix: str) -> set[K]:
+        node = self._root
+        for char in prefix:
+            if (node := node.children.get(char)) is None:
+                return set()
+        return node.keys
+
+    def match(self, prefixes: Iterable[str]) -> set[K]:
+        """Return the keys that have a token starting with each of the prefixes"""
+        matches: set[K] | None = None
+        for prefix in prefixes:
+            keys = self.find(prefix)
+            matches = set(keys) if matches is None else matches & keys
+            if not matches:
+                break
+        return matches or set()
@@ -5,6 +5,7 @@ from discord import Interaction
 from discord.ext import commands
 
 from cogs.errors import app
+from utils import tracing
 
 if TYPE_CHECKING:
     from main import ProjectHyperlink
@@ -12,6 +13,7 @@ else:
     ProjectHyperlink = commands.Bot
 
 
+@tracing.traced("check: is_verified")
 async def _is_verified(
     instance: commands.Context[ProjectHyperlink] | Interaction[ProjectHyperlink],
     suppress: bool = False,
@@ -37,6 +39,7 @@ async def _is_verified(
     return verified
 
 
+@tracing.traced("check: is_owner")
 async def _is_owner(
     instance: commands.Context[ProjectHyperlink] | Interaction[ProjectHyperlink],
     *,
@@ -0,0 +1,518 @@
+import asyncio
+import contextlib
+import io
+import posixpath
+import tempfile
+import time
+from collections import OrderedDict
+
+import config
+import discord
+from discord.ext import commands, tasks
+from fluent.runtime import FluentLocalization
+
+import cogs.checks as checks
+from drive import (
+    DriveError,
+    DriveIndex,
+    DriveItem,
+    FolderCache,
+    FolderResolver,
+    GoogleDrive,
+    ingest,
+)
+from drive.upload import (
+    UPLOAD_CONCURRENCY,
+    read_attachment,
+    render_progress,
+    upload_stream,
+)
+from main import ProjectHyperlink
+from utils import metrics
+from utils.paginator import Paginator
+from utils.search import NameIndex, tokenize
+from utils.utils import yesOrNo
+
+SEARCH_RESULT_LIMIT = 100
+RESULTS_PER_PAGE = 10
+SEARCH_CACHE_TTL = 60.0
+SEARCH_CACHE_SIZE = 256
+
+
+class Drive(commands.Cog):
+    """Access notes and other material"""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.drive = GoogleDrive(bot.session)
+        self.index = DriveIndex(
+            bot.pool, self.drive, (self.drive.root, self.drive.past_papers)
+        )
+        self.folders = FolderCache(self.drive, self.index)
+        self.resolver = FolderResolver(self.drive, self.index)
+        self._results: OrderedDict[str, tuple[float, list[DriveItem]]] = OrderedDict()
+
+    async def cog_load(self) -> None:
+        self.sync_index.start()
+
+    async def cog_unload(self) -> None:
+        self.sync_index.cancel()
+
+    @tasks.loop(minutes=2)
+    async def sync_index(self):
+        """Build the local Drive index on the first run, then apply changes"""
+        try:
+            if self.index.ready.is_set():
+                # Cached results could now point at moved or deleted files
+                if await self.index.sync():
+                    self._results.clear()
+            else:
+                await self.index.load()
+        except DriveError as error:
+            self.bot.logger.warning(f"Drive index sync failed: {error}")
+
+    async def find(self, query: str, limit: int = 25) -> list[DriveItem]:
+        """Search the local index, or the Drive itself until the index is built"""
+        if self.index.ready.is_set():
+            return self.index.search(query, limit)
+
+        keywords = [token for token in tokenize(query) if len(token) > 2]
+        if not keywords:
+            return []
+        drive_query = " or ".join(f"name contains '{word}'" for word in keywords)
+        files = {
+            file["id"]: DriveItem.from_api(file)
+            for file in await self.drive.list_items(drive_query)
+        }
+
+        # Rank the raw matches the same way as the index would
+        names: NameIndex[str] = NameIndex()
+        for file in files.values():
+            names.add(file.id, file.name)
+        return [files[id] for id, _ in names.search(query, limit)]
+
+    async def cached_find(self, query: str) -> list[DriveItem]:
+        """Same as `find`, but repeated queries are answered from a short cache.
+
+        Queries are cached by their normalised tokens, so `CS-201 endsem` and
+        `cs201 Endsem` share an entry.
+        """
+        key = " ".join(tokenize(query))
+        entry = self._results.get(key)
+        hit = entry is not None and time.monotonic() - entry[0] < SEARCH_CACHE_TTL
+        metrics.cache_lookup("drive_search", hit)
+        if hit:
+            self._results.move_to_end(key)
+            return entry[1]
+
+        files = await self.find(query, SEARCH_RESULT_LIMIT)
+        self._results[key] = (time.monotonic(), files)
+        self._results.move_to_end(key)
+        if len(self._results) > SEARCH_CACHE_SIZE:
+            self._results.popitem(last=False)
+        return files
+
+    async def result_embeds(
+        self, files: list[DriveItem], l10n: FluentLocalization
+    ) -> list[discord.Embed]:
+        """Render search results as a folders embed and a files embed"""
+        # Sorting the links based on their parents
+        file_links = {}
+        folder_links = {}
+        for file in files:
+            if not file.parents:
+                continue
+            parent = file.parents[0]
+            if file.is_folder:
+                if parent not in folder_links:
+                    folder_links[parent] = []
+                folder_links[parent].append(f"[{file.name}]({file.web_view_link})")
+            else:
+                if parent not in file_links:
+                    file_links[parent] = []
+                file_links[parent].append(
+                    f"[[Download]]({file.download_link}) "
+                    f"[{file.name}]({file.web_view_link})"
+                )
+
+        # Resolve every parent folder on the page at once
+        try:
+            parent_folders = await self.folders.get_many([*folder_links, *file_links])
+        except DriveError as error:
+            self.bot.logger.warning(str(error))
+            parent_folders = {}
+
+        # Add the links to the final embed(s)
+        embeds = []
+        bundle = (
+            (l10n.format_value("folders"), l10n.format_value("files")),
+            (folder_links, file_links),
+        )
+        for name, links in zip(*bundle):
+            desc = ""
+            for parent in links:
+                if (parent_data := parent_folders.get(parent)) is not None:
+                    parent_link = f"[{parent_data.name}]({parent_data.web_view_link})"
+                else:
+                    parent_link = f"`{parent}`"
+                desc += f"\n**{parent_link}**:\n"
+                for link in links[parent]:
+                    desc += f"{link}\n"
+
+            if desc:
+                embed = discord.Embed(
+                    title=name, description=desc, color=discord.Color.blurple()
+                )
+                embeds.append(embed)
+        return embeds
+
+    async def cog_check(self, ctx: commands.Context[ProjectHyperlink]) -> bool:
+        self.l10n = await self.bot.get_l10n(ctx.guild.id if ctx.guild else 0)
+        return await checks._is_verified(ctx)
+
+    @commands.group(invoke_without_command=True)
+    async def drive(self, ctx):
+        """Command group for Google Drive functionality"""
+        await ctx.send_help(ctx.command)
+
+    @drive.command()
+    @commands.cooldown(2, 10.0, commands.BucketType.user)
+    async def search(self, ctx, *query: str):
+        """Search for the given query and send a corresponding embed.
+
+        Results are ranked by how well their names match the query. Typos, \
+        course codes written as `CS-201`, `cs 201` or `CS201`, and initials \
+        like `DSA` are all understood. Results are shown a page at a time.
+
+        Parameters
+        ------------
+        `query`: <class 'list'>
+            The keywords to be searched on the Drive, separated by spaces.
+        """
+        await ctx.message.add_reaction(config.emojis["loading"])
+
+        try:
+            files = await self.cached_find(" ".join(query))
+        except DriveError as error:
+            self.bot.logger.warning(str(error))
+            await ctx.reply(self.l10n.format_value("drive-unavailable"))
+            await ctx.message.remove_reaction(config.emojis["loading"], self.bot.user)
+            return
+
+        # Exit if no results were found for the given query
+        if not files:
+            await ctx.reply(self.l10n.format_value("result-notfound"))
+            await ctx.message.remove_reaction(config.emojis["loading"], self.bot.user)
+            return
+
+        l10n = self.l10n
+
+        async def render(page: int):
+            chunk = files[page * RESULTS_PER_PAGE : (page + 1) * RESULTS_PER_PAGE]
+            return dict(embeds=await self.result_embeds(chunk, l10n))
+
+        page_count = -(-len(files) // RESULTS_PER_PAGE)
+        paginator = Paginator(render, page_count, author_id=ctx.author.id)
+        try:
+            await paginator.send(ctx)
+        except discord.errors.HTTPException:
+            await ctx.reply(self.l10n.format_value("body-too-long"))
+
+        await ctx.message.remove_reaction(config.emojis["loading"], self.bot.user)
+
+    @commands.group()
+    async def driveAdmin(self, ctx):
+        """Command group for admin interaction with the Google Drive"""
+        await commands.is_owner().predicate(ctx)
+        if not ctx.invoked_subcommand:
+            await ctx.send_help(ctx.command)
+
+    @driveAdmin.command(name="upload")
+    async def uploadAttachment(self, ctx, option: str, *, file_path: str):
+        """Upload message attachment to the Google Drive.
+
+        Root folder defaults to `Notes` (ID: `1U2taK5kEhOiUJi70ZkU2aBWY83uVuMmD`)
+
+        Parameters
+        ------------
+        `option`: <class 'str'>
+            The procedure to be followed for uploading.
+            Available options are:
+                `default`: When using this option, `file_path` should be absolute. \
+                    The format is as follows: `path/to/file/[file name]`. The user will \
+                    be prompted each time a folder is not found in the given path. \
+                    Note: To upload in the root folder, write `/[file name]`.
+                `pp`: When using this option, `file_path` should be relative to the \
+                    course folder. The format is as follows: `folder/[file name]`, \
+                    where `folder` is the folder inside the course folder. Note \
+                    that this folder will be created automatically if it does not exist.
+
+        `file_path`: <class 'str'>
+            The path of the file to upload. Format: `path/to/file/[file name]`.
+            If the string ends with a `/`, i.e, if `[file name]` is not specified, \
+            the file name defaults to the name of the attachment. Note that a \
+            file extension needs to be specified. When several files are \
+            attached, each one keeps its own name and `[file name]` is ignored.
+        """
+        if not ctx.message.attachments:
+            await ctx.reply(self.l10n.format_value("attachment-notfound"))
+            return
+
+        try:
+            await ctx.message.add_reaction(config.emojis["loading"])
+        except discord.Forbidden:
+            pass
+
+        # Create parent folder list
+        # The last folder in this list will be where the attachment is uploaded
+        parents = [await self.folders.get(self.drive.root)]
+        if option == "default":
+            *file_path, filename = file_path.split("/")
+
+            async def confirm(folder: str) -> bool:
+                """Ask the user if they wish to create a new folder"""
+                message = await ctx.reply(
+                    self.l10n.format_value("folder-notfound", {"folder": folder})
+                )
+                return await yesOrNo(ctx, message)
+
+            # Resolve each folder and append them to the parent folder list
+            folders = await self.resolver.resolve(
+                parents[-1], [folder for folder in file_path if folder], confirm
+            )
+            if folders is None:
+                await ctx.send("upload-cancelled")
+                await ctx.message.remove_reaction(
+                    config.emojis["loading"], self.bot.user
+                )
+                return
+            parents.extend(folders)
+
+            # Default to the attachment name if file name is not specified
+            if not filename:
+                filename = ctx.message.attachments[0].filename.replace("_", " ")
+
+        elif option == "pp":
+            folder, filename = file_path.split("/", 1)
+
+            # Default to the attachment name if file name is not specified
+            if not filename:
+                filename = ctx.message.attachments[0].filename.replace("_", " ")
+
+            # Get main course folder
+            parents.append(await self.folders.get(self.drive.past_papers))
+            course_folder = await self.resolver.find(
+                parents[-1].id, filename.split(" ", 1)[0]
+            )
+
+            if course_folder is None:
+                question = await ctx.reply(self.l10n.format_value("enter-folder-name"))
+
+                def check(message: discord.Message) -> bool:
+                    """Check if the message sent is by the command author in the right channel"""
+                    return (
+                        message.author == ctx.author and message.channel == ctx.channel
+                    )
+
+                # Wait for the user to give a name for the course folder
+                message = await self.bot.wait_for("message", check=check)
+                if message.content.lower() == "cancel":
+                    await ctx.send("upload-cancelled")
+                    await ctx.message.remove_reaction(
+                        config.emojis["loading"], self.bot.user
+                    )
+                    return
+                await question.delete()
+                if ctx.guild and ctx.guild.me.guild_permissions.manage_messages:
+                    await message.delete()
+
+                # Create the course folder
+                course_folder = await self.resolver.create(
+                    parents[-1].id, message.content
+                )
+
+            # Find or create the child folder
+            parents.append(course_folder)
+            parents.extend(await self.resolver.resolve(course_folder, [folder]) or [])
+        else:
+            vars = {
+                "option": option,
+                "prefix": ctx.clean_prefix,
+                "command": ctx.command.qualified_name,
+            }
+            await ctx.reply(self.l10n.format_value("invalid-option", vars))
+            await ctx.message.remove_reaction(config.emojis["loading"], self.bot.user)
+            return
+
+        # Upload each attachment under its own name, unless a single one was named
+        attachments = ctx.message.attachments
+        if len(attachments) == 1:
+            uploads = {filename: attachments[0]}
+        else:
+            uploads = {}
+            for attachment in attachments:
+                name = attachment.filename.replace("_", " ")
+                if name in uploads:
+                    vars = {"name": name}
+                    await ctx.reply(self.l10n.format_value("file-name-repeated", vars))
+                    continue
+                uploads[name] = attachment
+
+        # Check for other files with the same name
+        for name in await self.resolver.existing_names(parents[-1].id, uploads):
+            vars = {"name": name}
+            await ctx.reply(self.l10n.format_value("file-already-exists", vars))
+            del uploads[name]
+        if not uploads:
+            await ctx.message.remove_reaction(config.emojis["loading"], self.bot.user)
+            return
+
+        # Stream the attachments straight from Discord into Drive
+        progress = {name: (0, attachment.size) for name, attachment in uploads.items()}
+        status = await ctx.reply(render_progress(progress))
+        semaphore = asyncio.Semaphore(UPLOAD_CONCURRENCY)
+
+        async def upload(name: str, attachment: discord.Attachment):
+            def report(sent: int):
+                progress[name] = (sent, attachment.size)
+
+            async with semaphore:
+                return await upload_stream(
+                    self.drive,
+                    read_attachment(self.bot.session, attachment),
+                    name=name,
+                    parent_id=parents[-1].id,
+                    size=attachment.size,
+                    progress=report,
+                )
+
+        async def show_progress():
+            while True:
+                await asyncio.sleep(2)
+                try:
+                    await status.edit(content=render_progress(progress))
+                except discord.NotFound:
+                    return
+                except discord.HTTPException as error:
+                    # Progress is cosmetic; the uploads carry on regardless
+                    self.bot.logger.warning(f"Updating upload progress failed: {error}")
+
+        reporter = asyncio.create_task(show_progress())
+        try:
+            results = await asyncio.gather(
+                *(upload(name, attachment) for name, attachment in uploads.items()),
+                return_exceptions=True,
+            )
+        finally:
+            reporter.cancel()
+
+        uploaded = []
+        for name, result in zip(uploads, results):
+            if isinstance(result, BaseException):
+                self.bot.logger.error(f"Uploading `{name}` failed", exc_info=result)
+                await ctx.reply(self.l10n.format_value("upload-failed", {"name": name}))
+            else:
+                uploaded.append(result)
+                if self.index.ready.is_set():
+                    self.index.add(DriveItem.from_api(result))
+        with contextlib.suppress(discord.HTTPException):
+            await status.delete()
+        if not uploaded:
+            await ctx.message.remove_reaction(config.emojis["loading"], self.bot.user)
+            return
+
+        # Create directory tree string
+        tree = ""
+        for i, parent in enumerate(parents):
+            tree += f"[{parent.name}]({parent.web_view_link})\n{'​ '*i*6}╰> "
+        tree += f"\n{'​ '*(len(parents) - 1)*6}╰> ".join(
+            f"[{file['name']}]({file['webViewLink']})" for file in uploaded
+        )
+
+        embed = discord.Embed(
+            title=self.l10n.format_value("upload-successful"),
+            description=tree,
+            color=discord.Color.blurple(),
+        )
+        await ctx.reply(embed=embed)
+        await ctx.message.remove_reaction(config.emojis["loading"], self.bot.user)
+
+    @driveAdmin.command(name="ingest")
+    async def ingestPapers(
+        self, ctx, dry_run: bool = True, rename_existing: bool = False
+    ):
+        """Bulk upload the past papers attached to the message.
+
+        Attach zip archives or the papers themselves. Each paper is renamed \
+        consistently and filed under the folder of the course code its name \
+        starts with; papers inside a folder of an archive go into a folder of \
+        the same name within the course folder. Papers whose content is \
+        already on the Drive are skipped.
+
+        Parameters
+        ------------
+        `dry_run`: <class 'bool'>
+            Only report what would be done. Defaults to `True`.
+
+        `rename_existing`: <class 'bool'>
+            Also rename the papers already on the Drive. Defaults to `False`.
+        """
+        if not ctx.message.attachments:
+            await ctx.reply(self.l10n.format_value("attachment-notfound"))
+            return
+        if not self.index.ready.is_set():
+            await ctx.reply(self.l10n.format_value("ingest-index-not-ready"))
+            return
+
+        await ctx.message.add_reaction(config.emojis["loading"])
+
+        papers = []
+        with contextlib.ExitStack() as stack:
+            for attachment in ctx.message.attachments:
+                file = stack.enter_context(
+                    tempfile.SpooledTemporaryFile(ingest.READ_SIZE)
+                )
+                async for data in read_attachment(self.bot.session, attachment):
+                    await asyncio.to_thread(file.write, data)
+                file.seek(0)
+                if posixpath.splitext(attachment.filename)[1].lower() == ".zip":
+                    papers.extend(await asyncio.to_thread(ingest.read_zip, file))
+                else:
+                    papers.extend(
+                        await asyncio.to_thread(
+                            ingest.read_file, attachment.filename, file
+                        )
+                    )
+
+            plan = ingest.plan(self.index, papers, rename_existing=rename_existing)
+            vars = {
+                "uploads": len(plan.uploads),
+                "folders": len(plan.new_folders),
+                "renames": len(plan.renames),
+                "skipped": len(plan.skipped),
+            }
+            report = discord.File(
+                io.BytesIO(plan.report().encode()), filename="ingest-plan.txt"
+            )
+            await ctx.reply(self.l10n.format_value("ingest-summary", vars), file=report)
+            if dry_run or not (plan.uploads or plan.renames):
+                await ctx.message.remove_reaction(
+                    config.emojis["loading"], self.bot.user
+                )
+                return
+
+            result = await ingest.execute(plan, self.drive, self.index, self.resolver)
+
+        for path, error in result.failed:
+            self.bot.logger.warning(f"Ingesting `{path}` failed: {error}")
+        vars = {
+            "uploaded": len(result.uploaded),
+            "renamed": len(result.renamed),
+            "failed": len(result.failed),
+        }
+        await ctx.reply(self.l10n.format_value("ingest-done", vars))
+        await ctx.message.remove_reaction(config.emojis["loading"], self.bot.user)
+
+
+async def setup(bot):
+    await bot.add_cog(Drive(bot))
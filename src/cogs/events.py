@@ -8,12 +8,19 @@ import discord
 from discord.ext import commands
 
 from base.cog import HyperlinkCog
+from database import Loader, queries
 from models.guild import GuildEvent
 
 
 class Events(HyperlinkCog):
     """Handle events"""
 
+    async def cog_load(self) -> None:
+        # Joins and leaves arrive in bursts, so their lookups are batched
+        self.event_loader = Loader(self.bot.pool, queries.GUILD_EVENTS, "guild_id")
+        self.join_role_loader = Loader(self.bot.pool, queries.JOIN_ROLES, "guild_id")
+        await super().cog_load()
+
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message):
         """Called when a message is sent"""
@@ -75,22 +82,18 @@ class Events(HyperlinkCog):
                 else:
                     logging.warning(f"guild_event -> Channel {event.channel_id} 404")
 
-        role_ids = await self.bot.pool.fetch(
-            "SELECT role_id FROM join_role WHERE guild_id = $1", member.guild.id
-        )
+        role_ids = await self.join_role_loader.load(member.guild.id)
         valid_roles: list[discord.Role] = []
         broken_ids = []
         for role_id in role_ids:
-            if role := member.guild.get_role(role_id["role"]):
+            if role := member.guild.get_role(role_id["role_id"]):
                 valid_roles.append(role)
             else:
-                broken_ids.append(role)
+                broken_ids.append(role_id["role_id"])
         if valid_roles:
             await member.add_roles(*valid_roles)
         if broken_ids:
-            await self.bot.pool.execute(
-                "DELETE FROM join_role WHERE role_id = ANY($1)", broken_ids
-            )
+            await self.bot.pool.run(queries.DELETE_JOIN_ROLES, broken_ids)
 
     @commands.Cog.listener()
     async def on_member_join(self, member: discord.Member):
@@ -100,28 +103,17 @@ class Events(HyperlinkCog):
 
         # Assign the bot role if any
         if member.bot:
-            bot_role_id = await self.bot.pool.fetchval(
-                "SELECT bot_role FROM guild WHERE id = $1", guild.id
-            )
-            if bot_role := guild.get_role(bot_role_id):
+            rows = await self.bot.guild_loader.load(guild.id)
+            if rows and (bot_role := guild.get_role(rows[0]["bot_role"])):
                 await member.add_roles(bot_role)
             return
 
         # Handle all generic events
-        events: list[GuildEvent] = await self.bot.pool.fetch(
-            """
-            SELECT
-                event_type,
-                channel_id,
-                message
-            FROM
-                guild_event
-            WHERE
-                guild_id = $1
-                AND event_type = ANY(ARRAY['join', 'welcome'])
-            """,
-            guild.id,
-        )
+        events = [
+            GuildEvent(**row)
+            for row in await self.event_loader.load(guild.id)
+            if row["event_type"] in ("join", "welcome")
+        ]
         if events:
             await self.join_handler(events, member)
 
@@ -133,22 +125,10 @@ class Events(HyperlinkCog):
         guild_id: int,
         reason: str | None = None,
     ):
-        response = await self.bot.pool.fetchrow(
-            """
-            SELECT
-                channel_id,
-                message
-            FROM
-                guild_event
-            WHERE
-                guild_id = $1
-                AND event_type = $2
-            """,
-            guild_id,
-            action,
-        )
+        rows = await self.event_loader.load(guild_id)
+        response = next((row for row in rows if row["event_type"] == action), None)
         if response is not None:
-            channel_id, message = response
+            channel_id, message = response["channel_id"], response["message"]
         else:
             return
 
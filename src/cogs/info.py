@@ -1,17 +1,33 @@
+import asyncio
+import pathlib
+import time
+from collections import OrderedDict
 from datetime import datetime
-from typing import Optional
+from typing import Any, Optional
 
+import aiohttp
+import asyncpg
 import config
 import discord
 from discord import app_commands
-from discord.ext import commands
-from tabulate import tabulate
+from discord.ext import commands, tasks
 
 from base.cog import HyperlinkCog
+from catalog import CourseCatalog, course_text, parse_course
 import cogs.checks as checks
 from cogs.errors.app import BatchNotFound, NotForBot, UnhandledError, UserNotFound
+from database import queries
 from main import ProjectHyperlink
-from models.courses import Course, Specifics
+from models.student import Student
+from utils import metrics
+from utils.paginator import Paginator
+from utils.reference import ReferenceTable
+from utils.search import tokenize
+from utils.table import grid
+
+PROFILE_CACHE_TTL = 600.0
+PROFILE_CACHE_SIZE = 1024
+COURSES_PER_PAGE = 5
 
 
 class Info(HyperlinkCog):
@@ -28,11 +44,41 @@ class Info(HyperlinkCog):
         )
         self.bot.tree.add_command(self.ctx_menu)
 
+        self.hostels: ReferenceTable[dict[str, dict[str, Any]]] = ReferenceTable(
+            bot.session,
+            "hostels",
+            lambda hostels: {hostel["id"]: hostel for hostel in hostels},
+            pathlib.Path(config.CACHE_DIR, "hostels.json"),
+        )
+        self.catalog = CourseCatalog(
+            bot.session, pathlib.Path(config.CACHE_DIR, "courses.json.gz")
+        )
+        self.batch_stats: dict[int, dict[str, list[int]]] = {}
+        # Students by the id of their user, with when they were fetched
+        self.profiles: OrderedDict[int, tuple[float, dict[str, Any] | None]] = (
+            OrderedDict()
+        )
+        # Rendered `/memlist` tables by batch, with `None` for every batch
+        self.memlist_tables: dict[int | None, str] = {}
+        self.notifications: asyncpg.Connection | None = None
+        self.relisten_task: asyncio.Task | None = None
+
     async def cog_load(self):
-        async with self.bot.session.get(f"{config.API_URL}/hostels") as resp:
-            assert resp.status == 200
-            data = await resp.json()
-        self.hostels = {hostel.pop("id"): hostel for hostel in data["data"]}
+        # Serve the last hostels saved until they are revalidated
+        await self.hostels.load_snapshot()
+        self.refresh_reference_data.start()
+        self.refresh_catalog.start()
+        await self.load_batch_stats()
+        await self.listen_for_imports()
+
+    async def cog_unload(self):
+        self.refresh_reference_data.cancel()
+        self.refresh_catalog.cancel()
+        if self.relisten_task is not None:
+            self.relisten_task.cancel()
+        if self.notifications is not None:
+            self.notifications.remove_termination_listener(self.notifications_lost)
+            await self.notifications.close()
 
     async def interaction_check(
         self, interaction: discord.Interaction[ProjectHyperlink], /
@@ -40,7 +86,11 @@ class Info(HyperlinkCog):
         self.l10n = await self.bot.get_l10n(interaction.guild_id or 0)
         return super().interaction_check(interaction)
 
-    @app_commands.command()
+    course_group = app_commands.Group(
+        name="course", description="Look up the courses taught at NITKKR"
+    )
+
+    @course_group.command(name="view")
     @app_commands.describe(
         code="The code of the course that you want",
         only_content="A boolean if you only want to see the content of the course",
@@ -48,14 +98,15 @@ class Info(HyperlinkCog):
     async def course(
         self, interaction: discord.Interaction, code: str, only_content: bool = True
     ):
-        async with self.bot.session.get(f"{config.API_URL}/courses/{code}") as resp:
-            # TODO: Make a global fetcher util
-            if resp.status != 200:
-                raise UnhandledError
-            data = (await resp.json())["data"]
-
-        specifics = [Specifics(**specific) for specific in data.pop("specifics")]
-        course = Course(**data, specifics=specifics)
+        course = self.catalog.get(code)
+        if course is None and not self.catalog.ready.is_set():
+            async with self.bot.session.get(f"{config.API_URL}/courses/{code}") as resp:
+                # TODO: Make a global fetcher util
+                if resp.status != 200:
+                    raise UnhandledError
+                course = parse_course((await resp.json())["data"])
+        if course is None:
+            raise UnhandledError
 
         embed = discord.Embed(color=interaction.user.color, title=course.title)
         if course.prereq:
@@ -95,16 +146,160 @@ class Info(HyperlinkCog):
         )
         await interaction.response.send_message(embeds=[embed, content_embed])
 
-    async def get_profile_embed(self, guild: bool, member) -> discord.Embed:
-        """Return the details of the given user in an embed"""
+    @course.autocomplete("code")
+    async def course_code_autocomplete(
+        self, interaction: discord.Interaction, current: str
+    ) -> list[app_commands.Choice[str]]:
+        # Answered from memory alone, so it never misses the interaction deadline
+        return [
+            app_commands.Choice(
+                name=f"{course.code} - {course.title}"[:100], value=course.code
+            )
+            for course in self.catalog.complete(current)
+        ]
+
+    @course_group.command(name="search")
+    @app_commands.describe(query="Words to look for in the courses' content")
+    async def course_search(self, interaction: discord.Interaction, query: str):
+        """Search the content, objectives and outcomes of every course"""
+        courses = self.catalog.search(query)
+        if not courses:
+            await interaction.response.send_message(
+                self.l10n.format_value("course-search-notfound", {"query": query}),
+                ephemeral=True,
+            )
+            return
+
+        tokens = set(tokenize(query))
+        color = interaction.user.color
+        l10n = self.l10n
+
+        async def render(page: int):
+            chunk = courses[page * COURSES_PER_PAGE : (page + 1) * COURSES_PER_PAGE]
+            embed = discord.Embed(
+                title=l10n.format_value("course-search-results", {"query": query}),
+                color=color,
+            )
+            for course in chunk:
+                # Show the first line that mentions the query, if any does
+                snippet = next(
+                    (
+                        line
+                        for line in course_text(course)
+                        if tokens.intersection(tokenize(line))
+                    ),
+                    course.kind,
+                )
+                if len(snippet) > 200:
+                    snippet = snippet[:197] + "..."
+                embed.add_field(
+                    name=f"{course.code} - {course.title}", value=snippet, inline=False
+                )
+            return dict(embed=embed)
+
+        page_count = -(-len(courses) // COURSES_PER_PAGE)
+        paginator = Paginator(render, page_count, author_id=interaction.user.id)
+        await paginator.start(interaction)
+
+    @course_group.command(name="path")
+    @app_commands.describe(code="The code of the course that you want to take")
+    async def course_path(self, interaction: discord.Interaction, code: str):
+        """View every course you need to have done before a course"""
+        course = self.catalog.get(code)
+        if course is None:
+            raise UnhandledError
+
+        levels = self.catalog.graph.path(course.code)
+        embed = discord.Embed(
+            color=interaction.user.color, title=f"{course.code} - {course.title}"
+        )
+        if not levels:
+            embed.description = self.l10n.format_value("course-path-none")
+        for number, codes in enumerate(levels, start=1):
+            lines = []
+            for prereq in codes:
+                link = f"[{prereq}](https://nksss.live/courses/{prereq})"
+                if (known := self.catalog.get(prereq)) is not None:
+                    lines.append(f"{link} - {known.title}")
+                else:
+                    lines.append(link)
+            embed.add_field(
+                name=self.l10n.format_value("course-path-step", {"step": number}),
+                value="\n".join(lines),
+                inline=False,
+            )
+        await interaction.response.send_message(embed=embed)
+
+    @course_path.autocomplete("code")
+    async def course_path_autocomplete(
+        self, interaction: discord.Interaction, current: str
+    ) -> list[app_commands.Choice[str]]:
+        return await self.course_code_autocomplete(interaction, current)
+
+    @tasks.loop(minutes=30)
+    async def refresh_reference_data(self):
+        """Revalidate the small lookup tables, keeping the old ones on failure"""
+        if await self.hostels.refresh():
+            self.logger.info(f"Hostels updated to version {self.hostels.version}")
+
+    @tasks.loop(hours=6)
+    async def refresh_catalog(self):
+        """Mirror the course catalog, starting from the snapshot on the first run"""
+        if self.refresh_catalog.current_loop == 0:
+            await self.catalog.load_snapshot()
+        try:
+            changed, removed = await self.catalog.refresh()
+        except (
+            aiohttp.ClientError,
+            asyncio.TimeoutError,
+            KeyError,
+            TypeError,
+            ValueError,
+        ) as error:
+            self.logger.warning(f"Refreshing the course catalog failed: {error!r}")
+            return
+        if changed or removed:
+            self.logger.info(
+                f"Course catalog refreshed: {len(changed)} changed, "
+                f"{len(removed)} removed"
+            )
+
+    async def fetch_student(self, user_id: int) -> dict[str, Any] | None:
+        """Return the student linked to a user, cached until their details change"""
+        entry = self.profiles.get(user_id)
+        hit = entry is not None and time.monotonic() - entry[0] < PROFILE_CACHE_TTL
+        metrics.cache_lookup("profile", hit)
+        if hit:
+            self.profiles.move_to_end(user_id)
+            return entry[1]
+
         async with self.bot.session.get(
-            f"{config.API_URL}/students/{member.id}",
+            f"{config.API_URL}/students/{user_id}",
             headers={"Authorization": f"Bearer {config.API_TOKEN}"},
         ) as resp:
             if resp.status == 200:
                 student = (await resp.json())["data"]
+            elif resp.status == 404:
+                student = None
             else:
-                return discord.Embed()
+                return None
+
+        self.profiles[user_id] = (time.monotonic(), student)
+        self.profiles.move_to_end(user_id)
+        if len(self.profiles) > PROFILE_CACHE_SIZE:
+            self.profiles.popitem(last=False)
+        return student
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        if before.roles != after.roles or before.nick != after.nick:
+            self.profiles.pop(after.id, None)
+
+    async def get_profile_embed(self, guild: bool, member) -> discord.Embed:
+        """Return the details of the given user in an embed"""
+        student = await self.fetch_student(member.id)
+        if student is None:
+            return discord.Embed()
 
         # Set color based on context
         if guild and isinstance(member, discord.Member):
@@ -126,8 +321,10 @@ class Info(HyperlinkCog):
         embed.set_thumbnail(url=member.display_avatar.url)
 
         # Add generic student details
-        if hostel := student["hostel_id"]:
-            hostel = f"{hostel} - {self.hostels[hostel]['name']}"
+        # Hostels unknown to the last table fetched are shown by their id alone
+        hostels = self.hostels.data or {}
+        if (hostel := student["hostel_id"]) and hostel in hostels:
+            hostel = f"{hostel} - {hostels[hostel]['name']}"
 
         fields = {
             "roll": student["roll_number"],
@@ -146,21 +343,19 @@ class Info(HyperlinkCog):
         for name, value in fields.items():
             embed.add_field(name=self.l10n.format_value(name), value=value)
 
-        # Fetch member roles
+        # Fetch member roles, leaving out the ones every student like them has
         user_roles = []
         if guild:
-            ignored_roles = [
+            ignored_roles = {
                 student["section"][:4],
                 student["section"][:3] + student["section"][4:].zfill(2),
                 student["hostel_id"],
                 *[club["alias"] or club["name"] for club in student["clubs"]],
                 "@everyone",
+            }
+            user_roles = [
+                role.mention for role in member.roles if role.name not in ignored_roles
             ]
-            for role in member.roles:
-                try:
-                    ignored_roles.remove(role.name)
-                except ValueError:
-                    user_roles.append(role.mention)
             if user_roles:
                 user_roles = ", ".join(user_roles[::-1])
 
@@ -246,9 +441,7 @@ class Info(HyperlinkCog):
             if not member.guild_permissions.change_nickname:
                 raise commands.MissingPermissions(["change_nickname"])
 
-        name = await self.bot.pool.fetchval(
-            "SELECT name FROM student WHERE discord_id = $1", member.id
-        )
+        name = await self.bot.pool.run(queries.STUDENT_NAME, member.id)
 
         if not name:
             raise UserNotFound(member=member)
@@ -264,10 +457,112 @@ class Info(HyperlinkCog):
         )
         await interaction.response.send_message(embed=embed)
 
+    async def load_batch_stats(self) -> None:
+        """Load the student counts of every section of every batch"""
+        stats: dict[int, dict[str, list[int]]] = {}
+        for row in await self.bot.pool.run(queries.BATCH_STATS):
+            counts = [row["joined"], row["remaining"], row["verified"]]
+            stats.setdefault(row["batch"], {})[row["section"]] = counts
+        self.batch_stats = stats
+        self.memlist_tables.clear()
+
+    async def listen_for_imports(self) -> None:
+        """Open the connection that student imports are announced on.
+
+        Imports run outside the bot and announce themselves with a NOTIFY. A
+        LISTEN holds its connection for as long as the bot runs, so it gets a
+        connection of its own rather than one taken from the pool.
+        """
+        delay = 1
+        while True:
+            try:
+                connection = await asyncpg.connect(config.DB().DSN)
+                break
+            except (OSError, asyncpg.PostgresError) as error:
+                self.logger.warning(f"Listening for student imports failed: {error!r}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 60)
+
+        await connection.add_listener("student_import", self.student_imported)
+        connection.add_termination_listener(self.notifications_lost)
+        self.notifications = connection
+
+    def notifications_lost(self, connection: asyncpg.Connection):
+        self.logger.warning("Lost the connection student imports are announced on")
+        self.notifications = None
+        self.relisten_task = asyncio.create_task(self.relisten())
+
+    async def relisten(self):
+        await self.listen_for_imports()
+        # An import announced while the connection was down was never heard
+        try:
+            await self.load_batch_stats()
+        except (OSError, asyncpg.PostgresError) as error:
+            self.logger.warning(f"Reloading the batch stats failed: {error!r}")
+
+    def student_imported(self, connection, pid: int, channel: str, batch: str):
+        self.bot.dispatch("student_import", int(batch))
+
+    @commands.Cog.listener()
+    async def on_user_verify(self, student: Student, old_user_id: int | None):
+        self.profiles.pop(student.discord_id, None)
+        self.profiles.pop(old_user_id, None)
+        await self.recount_section(student.batch, student.section)
+
+    @commands.Cog.listener()
+    async def on_student_unlink(self, batch: int, section: str):
+        await self.recount_section(batch, section)
+
+    async def recount_section(self, batch: int, section: str):
+        row = await self.bot.pool.run(queries.SECTION_STATS, batch, section)
+        if row is None:
+            return
+        sections = self.batch_stats.setdefault(batch, {})
+        sections[section] = [row["joined"], row["remaining"], row["verified"]]
+        self.memlist_tables.pop(batch, None)
+        self.memlist_tables.pop(None, None)
+
+    @commands.Cog.listener()
+    async def on_student_import(self, batch: int):
+        await self.load_batch_stats()
+
+    def render_memlist(self, batch: int | None) -> str:
+        """Render the stats of a batch, or of every batch if none is given"""
+        if batch is None:
+            headers = ("Batch", "Joined", "Remaining", "Verified")
+            rows = [
+                [str(year), *map(sum, zip(*sections.values()))]
+                for year, sections in sorted(self.batch_stats.items())
+            ]
+            groups = [[row] for row in rows]
+        else:
+            headers = ("Section", "Joined", "Remaining", "Verified")
+            # Subsections (`CS-A1`, `CS-A2`) are merged into their section, and
+            # sections of the same branch are grouped together
+            merged: dict[str, list[int]] = {}
+            for section, counts in sorted(self.batch_stats[batch].items()):
+                total = merged.setdefault(section[:4], [0, 0, 0])
+                for i, count in enumerate(counts):
+                    total[i] += count
+            rows = [[section, *counts] for section, counts in merged.items()]
+            groups = []
+            for row in rows:
+                if groups and groups[-1][0][0][:2] == row[0][:2]:
+                    groups[-1].append(row)
+                else:
+                    groups.append([row])
+
+        total = [sum(column) for column in zip(*(row[1:] for row in rows))] or [0] * 3
+        return grid(headers, [*groups, [["Total", *total]]])
+
     @app_commands.command()
-    @app_commands.describe(batch="The batch of which the stats will be displayed")
+    @app_commands.describe(
+        batch="The batch of which the stats will be displayed, or all if omitted"
+    )
     @checks.is_verified()
-    async def memlist(self, interaction: discord.Interaction, batch: int):
+    async def memlist(
+        self, interaction: discord.Interaction, batch: Optional[int] = None
+    ):
         """View the stats of students of the specified batch.
 
         The displayed table has 3 value columns and is separated by sub-sections
@@ -282,72 +577,17 @@ class Info(HyperlinkCog):
         Parameters
         ------------
         `batch`: <class 'int'>
-            The batch for which the stats are shown.
+            The batch for which the stats are shown. If omitted, every batch \
+            is shown with one row each.
         """
-        data = await self.bot.pool.fetch(
-            """
-            SELECT
-                section,
-                COUNT(discord_id) AS joined,
-                COUNT(*) - COUNT(discord_id) AS remaining,
-                COUNT(*) FILTER (WHERE is_verified) AS verified
-            FROM
-                student
-            WHERE
-                batch = $1
-            GROUP BY
-                section
-            ORDER BY
-                section
-            """,
-            batch,
-        )
-        if not data:
+        if batch is not None and batch not in self.batch_stats:
             raise BatchNotFound(batch=batch)
 
-        sections, counts = [], []
-        for row in data:
-            if sections and row["section"][:4] == sections[-1]:
-                count = counts[-1]
-                counts[-1] = [
-                    count[0] + row["joined"],
-                    count[1] + row["remaining"],
-                    count[2] + row["verified"],
-                ]
-            else:
-                sections.append(row["section"][:4])
-                counts.append([row["joined"], row["remaining"], row["verified"]])
-        data = [[section, *count] for section, count in zip(sections, counts)]
-
-        # Get the indices of the rows to be deleted
-        indices = []
-        previous = sections[0]
-        for i, section in zip(range(2, len(sections) * 2, 2), sections[1:]):
-            if section[:2] == previous[:2]:
-                indices.append(i + 2)
-            previous = section
-
-        # Get total values for each numerical column
-        total = [sum(count) for count in zip(*counts)]
-
-        table = tabulate(
-            [*data, ["Total", *total]],
-            headers=("Section", "Joined", "Remaining", "Verified"),
-            tablefmt="grid",
-        ).split("\n")
-        table[2] = table[0]
-
-        # Delete the extra dashed lines
-        cropped_table = []
-        for i, row in enumerate(table):
-            try:
-                indices.remove(i)
-            except ValueError:
-                cropped_table.append(row)
-        cropped_table = "\n".join(cropped_table)
+        if (table := self.memlist_tables.get(batch)) is None:
+            table = self.memlist_tables[batch] = self.render_memlist(batch)
 
         embed = discord.Embed(
-            description=f"```swift\n{cropped_table}```", color=discord.Color.blurple()
+            description=f"```swift\n{table}```", color=discord.Color.blurple()
         )
         await interaction.response.send_message(embed=embed)
 
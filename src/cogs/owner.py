@@ -1,20 +1,57 @@
+import asyncio
+import io
 import os
+import re
+import threading
+import time
+import tracemalloc
 from typing import Literal, Optional
 
+import asyncpg
 import discord
 from discord import app_commands
 from discord.ext import commands
+from tabulate import tabulate
 
 from base.cog import HyperlinkCog
 from cogs import ALL_EXTENSIONS
 import cogs.checks as checks
 from main import ProjectHyperlink
+from utils import heap, profiler
+from utils.paginator import Paginator
 from utils.utils import is_alone, yesOrNo
 
+# Statements that can only read, once any `EXPLAIN` in front has been stripped
+READ_STATEMENTS = ("select", "show", "table", "values", "with")
+SQL_MAX_ROWS = 1000
+SQL_ROWS_PER_PAGE = 15
+
+
+def is_read_only(query: str) -> bool:
+    """Return whether a statement starts like a read.
+
+    This only turns obvious mistakes away early. What keeps the console from
+    writing is the read-only transaction that statements run in, which is
+    always rolled back.
+    """
+    # `EXPLAIN ANALYZE` is allowed, as long as the statement explained is a read
+    body = re.sub(
+        r"^\s*explain\b\s*(\([^)]*\)|analyze\b|verbose\b|\s)*", "", query, flags=re.I
+    )
+    words = body.split(maxsplit=1)
+    return bool(words) and words[0].lower() in READ_STATEMENTS
+
 
 class OwnerOnly(HyperlinkCog):
     """Bot owner commands"""
 
+    def __init__(self, bot: ProjectHyperlink):
+        super().__init__(bot)
+        self.profiling = asyncio.Lock()
+        self.heap_snapshots: dict[str, heap.HeapSnapshot] = {}
+
+    heap_group = app_commands.Group(name="heap", description="Track memory growth")
+
     async def interaction_check(
         self, interaction: discord.Interaction[ProjectHyperlink]
     ) -> bool:
@@ -93,6 +130,241 @@ class OwnerOnly(HyperlinkCog):
             self.fmv("reload-successful", {"ext": extension}), ephemeral=True
         )
 
+    @app_commands.command(name="profile-cpu")
+    @app_commands.describe(
+        seconds="How long to sample the bot for",
+        top="How many functions to list in the summary",
+    )
+    async def profile_cpu(
+        self,
+        interaction: discord.Interaction,
+        seconds: app_commands.Range[int, 1, 300],
+        top: app_commands.Range[int, 5, 100] = 25,
+    ):
+        """Sample the running bot and return a CPU profile.
+
+        Paramters
+        -----------
+        seconds: <class 'int'>
+            The duration to sample for. The bot keeps running meanwhile.
+        top: <class 'int'>
+            The number of hot functions to include in the summary.
+        """
+        if self.profiling.locked():
+            await interaction.response.send_message(
+                self.fmv("profile-busy"), ephemeral=True
+            )
+            return
+
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        async with self.profiling:
+            # Only the event loop's thread: the others are mostly parked
+            # executor workers and the log listener
+            profile = await asyncio.to_thread(
+                profiler.sample, seconds, threading.get_ident()
+            )
+
+        files = [
+            discord.File(
+                io.BytesIO(profile.collapsed().encode("utf-8")), "cpu-profile.folded"
+            ),
+            discord.File(io.BytesIO(profile.top(top).encode("utf-8")), "cpu-top.txt"),
+        ]
+        await interaction.followup.send(
+            self.fmv(
+                "profile-cpu-done",
+                {
+                    "samples": profile.samples,
+                    "idle": profile.idle,
+                    "seconds": round(profile.duration, 1),
+                },
+            ),
+            files=files,
+            ephemeral=True,
+        )
+
+    async def snapshot_autocomplete(self, _: discord.Interaction, current: str):
+        return [
+            app_commands.Choice(name=name, value=name)
+            for name in self.heap_snapshots
+            if current.lower() in name.lower()
+        ][:25]
+
+    @heap_group.command(name="start")
+    @app_commands.describe(frames="How many frames to store per allocation")
+    async def heap_start(
+        self,
+        interaction: discord.Interaction,
+        frames: app_commands.Range[int, 1, 50] = 10,
+    ):
+        """Start tracing memory allocations"""
+        if tracemalloc.is_tracing():
+            await interaction.response.send_message(
+                self.fmv("heap-already-tracing"), ephemeral=True
+            )
+            return
+
+        tracemalloc.start(frames)
+        await interaction.response.send_message(
+            self.fmv("heap-started", {"frames": frames}), ephemeral=True
+        )
+
+    @heap_group.command(name="snapshot")
+    @app_commands.describe(name="The name to save the snapshot under")
+    async def heap_snapshot(self, interaction: discord.Interaction, name: str):
+        """Take a named snapshot of the heap"""
+        if not tracemalloc.is_tracing():
+            await interaction.response.send_message(
+                self.fmv("heap-not-tracing"), ephemeral=True
+            )
+            return
+
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        snapshot = await asyncio.to_thread(heap.take, name)
+        self.heap_snapshots[name] = snapshot
+
+        current, peak = tracemalloc.get_traced_memory()
+        await interaction.followup.send(
+            self.fmv(
+                "heap-snapshot-taken",
+                {
+                    "name": name,
+                    "current": round(current / 1024**2, 1),
+                    "peak": round(peak / 1024**2, 1),
+                },
+            ),
+            ephemeral=True,
+        )
+
+    @heap_group.command(name="diff")
+    @app_commands.describe(
+        old="The snapshot to compare against",
+        new="The newer snapshot; a fresh one is taken if left blank",
+        top="How many allocation sites and types to list",
+    )
+    @app_commands.autocomplete(old=snapshot_autocomplete, new=snapshot_autocomplete)
+    async def heap_diff(
+        self,
+        interaction: discord.Interaction,
+        old: str,
+        new: Optional[str] = None,
+        top: app_commands.Range[int, 5, 100] = 25,
+    ):
+        """Compare two heap snapshots"""
+        names = [old] if new is None else [old, new]
+        for name in names:
+            if name not in self.heap_snapshots:
+                await interaction.response.send_message(
+                    self.fmv("heap-snapshot-notfound", {"name": name}), ephemeral=True
+                )
+                return
+        if new is None and not tracemalloc.is_tracing():
+            await interaction.response.send_message(
+                self.fmv("heap-not-tracing"), ephemeral=True
+            )
+            return
+
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        if new is None:
+            new_snapshot = await asyncio.to_thread(heap.take, "now")
+        else:
+            new_snapshot = self.heap_snapshots[new]
+        report = await asyncio.to_thread(
+            heap.diff, self.heap_snapshots[old], new_snapshot, limit=top
+        )
+
+        file = discord.File(io.BytesIO(report.encode("utf-8")), "heap-diff.txt")
+        await interaction.followup.send(file=file, ephemeral=True)
+
+    @heap_group.command(name="stop")
+    async def heap_stop(self, interaction: discord.Interaction):
+        """Stop tracing memory allocations and drop all snapshots"""
+        tracemalloc.stop()
+        self.heap_snapshots.clear()
+        await interaction.response.send_message(
+            self.fmv("heap-stopped"), ephemeral=True
+        )
+
+    @app_commands.command()
+    @app_commands.describe(
+        query="A read-only SQL statement",
+        explain="Run the statement with EXPLAIN (ANALYZE, BUFFERS) instead",
+    )
+    async def sql(
+        self, interaction: discord.Interaction, query: str, explain: bool = False
+    ):
+        """Run a read-only query against the database.
+
+        Paramters
+        -----------
+        query: <class 'str'>
+            The statement to run. Anything that is not a plain read is refused.
+        explain: <class 'bool'>
+            Whether to show the query plan with timings instead of the rows.
+        """
+        query = query.strip().rstrip(";")
+        if not is_read_only(query):
+            await interaction.response.send_message(
+                self.fmv("sql-refused"), ephemeral=True
+            )
+            return
+        if explain:
+            query = f"EXPLAIN (ANALYZE, BUFFERS) {query}"
+
+        await interaction.response.defer(ephemeral=True, thinking=True)
+
+        rows: list[asyncpg.Record] = []
+        async with self.bot.pool.acquire() as connection:
+            transaction = connection.transaction(readonly=True)
+            await transaction.start()
+            try:
+                await connection.execute("SET LOCAL statement_timeout = '30s'")
+                start = time.perf_counter()
+                async for row in connection.cursor(query):
+                    rows.append(row)
+                    if len(rows) > SQL_MAX_ROWS:
+                        break
+                elapsed = time.perf_counter() - start
+            except asyncpg.PostgresError as error:
+                await interaction.followup.send(
+                    self.fmv("sql-error", {"error": str(error)}), ephemeral=True
+                )
+                return
+            finally:
+                await transaction.rollback()
+
+        truncated = len(rows) > SQL_MAX_ROWS
+        rows = rows[:SQL_MAX_ROWS]
+        summary = self.fmv(
+            "sql-summary", {"rows": len(rows), "time": round(elapsed * 1000, 2)}
+        )
+        if truncated:
+            summary += " " + self.fmv("sql-truncated", {"limit": SQL_MAX_ROWS})
+
+        if explain:
+            lines = [row[0] for row in rows]
+            per_page = SQL_ROWS_PER_PAGE * 2
+        else:
+            headers = list(rows[0].keys()) if rows else []
+            per_page = SQL_ROWS_PER_PAGE
+
+        async def render(page: int):
+            chunk = rows[page * per_page : (page + 1) * per_page]
+            if explain:
+                body = "\n".join(lines[page * per_page : (page + 1) * per_page])
+            else:
+                body = tabulate(
+                    [[str(value)[:32] for value in row.values()] for row in chunk],
+                    headers=headers,
+                )
+            if len(body) > 1800:
+                body = body[:1797] + "..."
+            return dict(content=f"```\n{body or ' '}\n```\n{summary}")
+
+        page_count = -(-len(rows) // per_page)
+        paginator = Paginator(render, page_count, author_id=interaction.user.id)
+        await paginator.start(interaction, ephemeral=True)
+
     @commands.command()
     @commands.guild_only()
     async def sync(
@@ -3,6 +3,7 @@ from discord.ext import commands
 from base.cog import HyperlinkCog
 from base.context import HyperlinkContext
 import cogs.checks as checks
+from database import queries
 from main import ProjectHyperlink
 
 
@@ -15,9 +16,7 @@ class Prefix(HyperlinkCog):
     async def fetch_prefix(self, id: int) -> map:
         return map(
             lambda prefix: prefix["prefix"],
-            await self.bot.pool.fetch(
-                "SELECT prefix FROM bot_prefix WHERE guild_id = $1", id
-            ),
+            await self.bot.pool.run(queries.PREFIXES, id),
         )
 
     @commands.group(invoke_without_command=True)
@@ -43,9 +42,7 @@ class Prefix(HyperlinkCog):
             await ctx.reply("exists-true", l10n_context=dict(prefix=prefix))
             return
 
-        await self.bot.pool.execute(
-            "INSERT INTO bot_prefix VALUES ($1, $2)", ctx.guild.id, prefix
-        )
+        await self.bot.pool.run(queries.ADD_PREFIX, ctx.guild.id, prefix)
 
         await ctx.reply("add-success", l10n_context=dict(prefix=prefix))
 
@@ -64,11 +61,7 @@ class Prefix(HyperlinkCog):
             await ctx.reply("exists-false", l10n_context=dict(prefix=prefix))
             return
 
-        await self.bot.pool.execute(
-            "DELETE FROM bot_prefix WHERE guild_id = $1 AND prefix = $2",
-            ctx.guild.id,
-            prefix,
-        )
+        await self.bot.pool.run(queries.REMOVE_PREFIX, ctx.guild.id, prefix)
 
         await ctx.reply("remove-success", l10n_context=dict(prefix=prefix))
 
@@ -81,12 +74,8 @@ class Prefix(HyperlinkCog):
         `prefix`: <class 'str'>
             The prefix to set.
         """
-        await self.bot.pool.execute(
-            "DELETE FROM bot_prefix WHERE guild_id = $1", ctx.guild.id
-        )
-        await self.bot.pool.execute(
-            "INSERT INTO prefix VALUES ($1, $2)", ctx.guild.id, prefix
-        )
+        await self.bot.pool.run(queries.CLEAR_PREFIXES, ctx.guild.id)
+        await self.bot.pool.run(queries.ADD_PREFIX, ctx.guild.id, prefix)
 
         await ctx.reply("guild-prefix", l10n_context=dict(prefix=prefix))
 
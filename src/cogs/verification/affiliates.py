@@ -1,3 +1,4 @@
+import asyncio
 from collections.abc import Iterable
 
 import discord
@@ -5,6 +6,7 @@ from discord.ext import commands
 
 from base.cog import HyperlinkCog
 from cogs.verification.utils import kick_old
+from database import Loader, queries
 from models.student import Student
 
 
@@ -24,6 +26,8 @@ class AffiliateVerification(HyperlinkCog):
         self.affiliate_guild_ids: list[int] = [
             affiliate_guild_id["guild_id"] for affiliate_guild_id in affiliate_guild_ids
         ]
+        # A verification fans out to every affiliate guild at once
+        self.guild_role_loader = Loader(self.bot.pool, queries.GUILD_ROLES, "guild_id")
         await super().cog_load()
 
     @commands.Cog.listener()
@@ -31,19 +35,7 @@ class AffiliateVerification(HyperlinkCog):
         self, member: discord.Member, student: Student | None
     ):
         """Triggered when a user joins a affiliate's Discord server"""
-        guild_roles = await self.bot.pool.fetch(
-            """
-            SELECT
-                field,
-                value,
-                role_ids
-            FROM
-                guild_role
-            WHERE
-                guild_id = $1
-            """,
-            member.guild.id,
-        )
+        guild_roles = await self.guild_role_loader.load(member.guild.id)
 
         for guild_role in guild_roles:
             try:
@@ -86,11 +78,14 @@ class AffiliateVerification(HyperlinkCog):
         """Triggered when a student verifies"""
         assert student.discord_id is not None
 
-        for affiliate_guild_id in self.affiliate_guild_ids:
-            guild = self.bot.get_guild(affiliate_guild_id)
+        guilds = [self.bot.get_guild(guild_id) for guild_id in self.affiliate_guild_ids]
+        # Fetch every guild's locale in one go instead of one query per guild
+        l10ns = await asyncio.gather(
+            *(self.bot.get_l10n(guild_id) for guild_id in self.affiliate_guild_ids)
+        )
+        for guild, l10n in zip(guilds, l10ns):
             assert guild is not None
 
-            l10n = await self.bot.get_l10n(guild.id)
             await kick_old(guild, old_user_id, l10n)
 
             member = guild.get_member(student.discord_id)
@@ -1,3 +1,5 @@
+import asyncio
+
 import discord
 from discord.ext import commands
 
@@ -114,11 +116,14 @@ class ClubVerification(HyperlinkCog):
         """Triggered when a student in one or more clubs verifies"""
         assert student.discord_id is not None
 
-        for club_guild in self.club_guilds:
+        # Fetch every guild's locale in one go instead of one query per guild
+        l10ns = await asyncio.gather(
+            *(self.bot.get_l10n(club_guild.guild_id) for club_guild in self.club_guilds)
+        )
+        for club_guild, l10n in zip(self.club_guilds, l10ns):
             guild = self.bot.get_guild(club_guild.guild_id)
             assert guild is not None
 
-            l10n = await self.bot.get_l10n(guild.id)
             await kick_old(guild, old_user_id, l10n)
 
             member = guild.get_member(student.discord_id)
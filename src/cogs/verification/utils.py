@@ -11,6 +11,7 @@ import discord
 from fluent.runtime import FluentLocalization
 
 from cogs.errors.app import OTPTimeout, RollNotFound
+from database import queries
 from models.student import Student
 from utils.utils import generateID
 
@@ -195,27 +196,17 @@ async def verify(
         extra={"user": member},
     )
 
-    old_user_id: int | None = await bot.pool.fetchval(
-        "SELECT discord_id FROM student WHERE roll_number = $1",
-        student.roll_number,
-    )
+    old_user_id = await bot.pool.run(queries.STUDENT_DISCORD_ID, student.roll_number)
     # TODO: Remove this once `is_verified` column is ditched
     if old_user_id == member.id:
         old_user_id = None
 
     student.discord_id = member.id
-    await bot.pool.execute(
-        """
-        UPDATE
-            student
-        SET
-            discord_id = $1,
-            is_verified = true
-        WHERE
-            roll_number = $2
-        """,
-        student.discord_id,
-        student.roll_number,
+    rows = await bot.pool.run(
+        queries.VERIFY_STUDENT, student.discord_id, student.roll_number
     )
 
     bot.dispatch("user_verify", student, old_user_id)
+    for row in rows:
+        if row["roll_number"] != student.roll_number:
+            bot.dispatch("student_unlink", row["batch"], row["section"])
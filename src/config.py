@@ -21,6 +21,19 @@ LOG_URL = os.getenv("LOG_URL")  # Discord webhook URL for warnings and errors
 if not TESTING_MODE:
     assert LOG_URL is not None
 
+LOG_FILE = "logs/hyperlink.log"  # Rotating debug log
+CACHE_DIR = "cache"  # Snapshots of reference data, for warm restarts
+LOG_FORMAT = os.getenv("LOG_FORMAT") or "text"  # "text" or "json"
+
+# Commands slower than this (in seconds) are logged with a span breakdown
+SLOW_COMMAND_THRESHOLD = float(os.getenv("SLOW_COMMAND_THRESHOLD") or 2.0)
+
+# Statements slower than this (in seconds) are logged
+SLOW_QUERY_THRESHOLD = float(os.getenv("SLOW_QUERY_THRESHOLD") or 0.5)
+
+# Event loop stalls longer than this (in seconds) are logged with the blocking stack
+LOOP_LAG_THRESHOLD = float(os.getenv("LOOP_LAG_THRESHOLD") or 0.5)
+
 # IDs
 OWNER_IDS: tuple = (534651911903772674, 555580364068880414)
 
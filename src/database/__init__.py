@@ -0,0 +1,5 @@
+from .loader import Loader
+from .migrate import migrate
+from .pool import InstrumentedPool, create_pool
+
+__all__ = ("InstrumentedPool", "Loader", "create_pool", "migrate")
@@ -0,0 +1,83 @@
+"""Coalesce concurrent lookups into a single query.
+
+A burst of gateway events (say, fifty members joining at once) fans out into
+listeners that each look up the same few rows. A `Loader` collects every key
+requested in the same event loop tick and fetches them all with one
+`= ANY($1)` statement, then hands each caller the rows for its own key.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import defaultdict
+from typing import TYPE_CHECKING, Generic, Hashable, Iterable, TypeVar
+
+from asyncpg import Record
+
+from database.queries import Query
+from utils import metrics
+
+if TYPE_CHECKING:
+    from database.pool import InstrumentedPool
+
+K = TypeVar("K", bound=Hashable)
+
+BATCH_SIZE = metrics.Histogram(
+    "hyperlink_db_loader_batch_keys",
+    "Distinct keys fetched together by a loader",
+    ("query",),
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250),
+)
+
+
+class Loader(Generic[K]):
+    """Batch lookups of `query`, which takes an array of keys as `$1`.
+
+    Rows are matched back to the keys by their `key` column. Each caller gets
+    the list of rows for its key, which is empty if nothing matched.
+    """
+
+    def __init__(self, pool: InstrumentedPool, query: Query[list[Record]], key: str):
+        self.pool = pool
+        self.query = query
+        self.key = key
+        self._pending: dict[K, list[asyncio.Future[list[Record]]]] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    def load(self, key: K) -> asyncio.Future[list[Record]]:
+        loop = asyncio.get_running_loop()
+        if not self._pending:
+            loop.call_soon(self._dispatch)
+
+        future: asyncio.Future[list[Record]] = loop.create_future()
+        self._pending.setdefault(key, []).append(future)
+        return future
+
+    async def load_many(self, keys: Iterable[K]) -> list[list[Record]]:
+        return await asyncio.gather(*(self.load(key) for key in keys))
+
+    def _dispatch(self) -> None:
+        pending, self._pending = self._pending, {}
+        task = asyncio.create_task(self._fetch(pending))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _fetch(self, pending: dict[K, list[asyncio.Future[list[Record]]]]):
+        BATCH_SIZE.labels(self.query.name).observe(len(pending))
+        try:
+            rows = await self.pool.run(self.query, list(pending))
+        except Exception as error:
+            for futures in pending.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(error)
+            return
+
+        grouped: defaultdict[K, list[Record]] = defaultdict(list)
+        for row in rows:
+            grouped[row[self.key]].append(row)
+
+        for key, futures in pending.items():
+            for future in futures:
+                if not future.done():
+                    future.set_result(grouped[key])
@@ -0,0 +1,179 @@
+"""Versioned schema migrations.
+
+Migrations are the `NNNN_name.sql` files in `database/migrations`, applied in
+order, each in its own transaction. Applied versions are recorded in the
+`schema_migration` table. The bot applies pending migrations on startup; they
+can also be applied, or the hot queries checked for index usage, by hand:
+
+    cd src && python -m database.migrate [--check]
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import pathlib
+import re
+import sys
+from dataclasses import dataclass
+
+import asyncpg
+
+import config
+from database.queries import REGISTRY
+
+MIGRATIONS_PATH = pathlib.Path(__file__).parent / "migrations"
+
+# Arbitrary key so that two instances never migrate at the same time
+ADVISORY_LOCK_KEY = 0x4859504552
+
+logger = logging.getLogger("ProjectHyperlink")
+
+
+@dataclass
+class Migration:
+    version: int
+    name: str
+    path: pathlib.Path
+
+    @property
+    def sql(self) -> str:
+        return self.path.read_text()
+
+
+def get_migrations() -> list[Migration]:
+    migrations = []
+    for path in sorted(MIGRATIONS_PATH.glob("*.sql")):
+        version, name = path.stem.split("_", 1)
+        migrations.append(Migration(int(version), name, path))
+    return migrations
+
+
+async def apply_migrations(connection: asyncpg.Connection) -> list[Migration]:
+    """Apply every pending migration and return the ones that were applied"""
+    await connection.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_migration (
+            version     INTEGER PRIMARY KEY,
+            name        TEXT NOT NULL,
+            applied_at  TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+        """
+    )
+
+    applied = []
+    await connection.execute("SELECT pg_advisory_lock($1)", ADVISORY_LOCK_KEY)
+    try:
+        current: int = await connection.fetchval(
+            "SELECT COALESCE(MAX(version), 0) FROM schema_migration"
+        )
+        for migration in get_migrations():
+            if migration.version <= current:
+                continue
+
+            async with connection.transaction():
+                await connection.execute(migration.sql)
+                await connection.execute(
+                    "INSERT INTO schema_migration (version, name) VALUES ($1, $2)",
+                    migration.version,
+                    migration.name,
+                )
+            logger.info(f"Applied migration {migration.path.name}")
+            applied.append(migration)
+    finally:
+        await connection.execute("SELECT pg_advisory_unlock($1)", ADVISORY_LOCK_KEY)
+
+    return applied
+
+
+_SCANS = {"Seq Scan", "Index Scan", "Index Only Scan", "Bitmap Heap Scan"}
+_JOINS = {"Nested Loop", "Hash Join", "Merge Join"}
+
+
+def _unindexed_scans(plan: dict, joined: bool = False) -> list[str]:
+    """Return the tables a plan filters or joins on without an index condition"""
+    scans = []
+    if plan.get("Node Type") in _SCANS:
+        indexed = "Index Cond" in plan or "Recheck Cond" in plan
+        # A scan with nothing to filter or join on reads the whole table on
+        # purpose, like the stats queries do
+        if not indexed and ("Filter" in plan or joined):
+            scans.append(plan["Relation Name"])
+    joined = joined or plan.get("Node Type") in _JOINS
+    for child in plan.get("Plans", []):
+        scans.extend(_unindexed_scans(child, joined))
+    return scans
+
+
+async def check_indexes(connection: asyncpg.Connection) -> dict[str, list[str]]:
+    """Return the registered queries whose plans find rows without an index.
+
+    Sequential scans are disabled while planning so that the planner picks an
+    index whenever one can be used, regardless of how small the table is. That
+    alone proves nothing, since the planner then falls back to reading a whole
+    unrelated index, so each scan that filters a table must also narrow it
+    down with an index condition (`Index Cond`, or `Recheck Cond` on a bitmap
+    scan).
+    """
+    offenders: dict[str, list[str]] = {}
+    async with connection.transaction():
+        await connection.execute("SET LOCAL enable_seqscan = off")
+        await connection.execute("SET LOCAL plan_cache_mode = force_generic_plan")
+        for query in REGISTRY.values():
+            params = len(set(re.findall(r"\$(\d+)", query.sql)))
+            await connection.execute(f"PREPARE index_check AS {query.sql}")
+            try:
+                execute = "EXECUTE index_check"
+                if params:
+                    execute += f"({', '.join(['NULL'] * params)})"
+                plan = await connection.fetchval(f"EXPLAIN (FORMAT JSON) {execute}")
+            finally:
+                await connection.execute("DEALLOCATE index_check")
+
+            if scans := _unindexed_scans(json.loads(plan)[0]["Plan"]):
+                offenders[query.name] = scans
+    return offenders
+
+
+async def migrate(dsn: str, *, check: bool = True) -> None:
+    """Apply pending migrations and warn about hot queries without an index"""
+    connection: asyncpg.Connection = await asyncpg.connect(dsn)
+    try:
+        await apply_migrations(connection)
+        if check and (offenders := await check_indexes(connection)):
+            logger.warning(
+                f"{len(offenders)} hot queries do not use an index",
+                extra={
+                    "fields": {
+                        name: ", ".join(f"`{table}`" for table in tables)
+                        for name, tables in offenders.items()
+                    }
+                },
+            )
+    finally:
+        await connection.close()
+
+
+async def main(argv: list[str]) -> int:
+    connection: asyncpg.Connection = await asyncpg.connect(config.DB().DSN)
+    try:
+        if "--check" in argv:
+            offenders = await check_indexes(connection)
+            for name, tables in offenders.items():
+                print(f"{name}: no index condition on {', '.join(tables)}")
+            indexed = len(REGISTRY) - len(offenders)
+            print(f"{indexed}/{len(REGISTRY)} queries use an index")
+            return 1 if offenders else 0
+
+        applied = await apply_migrations(connection)
+        for migration in applied:
+            print(f"Applied {migration.path.name}")
+        print(f"{len(applied)} migration(s) applied")
+        return 0
+    finally:
+        await connection.close()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(sys.argv[1:])))
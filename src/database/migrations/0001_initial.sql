@@ -0,0 +1,79 @@
+-- Tables the bot has always relied on, plus indexes for every hot lookup.
+-- Everything is idempotent so that this can run against databases that were
+-- set up by hand before migrations existed.
+
+CREATE TABLE IF NOT EXISTS guild (
+    id          BIGINT PRIMARY KEY,
+    locale      TEXT,
+    bot_role    BIGINT,
+    edit_log    BIGINT,
+    delete_log  BIGINT
+);
+
+CREATE TABLE IF NOT EXISTS bot_prefix (
+    guild_id    BIGINT NOT NULL,
+    prefix      TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS bot_prefix_guild_id_prefix_idx
+    ON bot_prefix (guild_id, prefix);
+
+CREATE TABLE IF NOT EXISTS guild_event (
+    guild_id    BIGINT NOT NULL,
+    event_type  TEXT NOT NULL
+        CHECK (event_type IN ('ban', 'join', 'kick', 'leave', 'welcome')),
+    channel_id  BIGINT,
+    message     TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS guild_event_guild_id_event_type_idx
+    ON guild_event (guild_id, event_type);
+
+CREATE TABLE IF NOT EXISTS join_role (
+    guild_id    BIGINT NOT NULL,
+    role_id     BIGINT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS join_role_guild_id_role_id_idx
+    ON join_role (guild_id, role_id);
+CREATE INDEX IF NOT EXISTS join_role_role_id_idx
+    ON join_role (role_id);
+
+CREATE TABLE IF NOT EXISTS guild_role (
+    guild_id    BIGINT NOT NULL,
+    field       TEXT NOT NULL,
+    value       TEXT NOT NULL,
+    role_ids    BIGINT[] NOT NULL
+);
+CREATE INDEX IF NOT EXISTS guild_role_guild_id_idx
+    ON guild_role (guild_id);
+
+CREATE TABLE IF NOT EXISTS club (
+    name        TEXT PRIMARY KEY,
+    alias       TEXT
+);
+
+CREATE TABLE IF NOT EXISTS club_discord (
+    club_name   TEXT NOT NULL REFERENCES club (name),
+    guild_id    BIGINT NOT NULL,
+    guest_role  BIGINT,
+    member_role BIGINT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS club_discord_guild_id_idx
+    ON club_discord (guild_id);
+
+CREATE TABLE IF NOT EXISTS student (
+    roll_number TEXT PRIMARY KEY,
+    section     TEXT NOT NULL,
+    name        TEXT NOT NULL,
+    gender      CHAR(1),
+    mobile      TEXT,
+    birth_date  DATE,
+    email       TEXT NOT NULL,
+    batch       INTEGER NOT NULL,
+    hostel_id   TEXT,
+    room_id     TEXT,
+    discord_id  BIGINT,
+    is_verified BOOLEAN NOT NULL DEFAULT false
+);
+CREATE UNIQUE INDEX IF NOT EXISTS student_discord_id_idx
+    ON student (discord_id);
+CREATE INDEX IF NOT EXISTS student_batch_section_idx
+    ON student (batch, section);
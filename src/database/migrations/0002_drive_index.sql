@@ -0,0 +1,19 @@
+-- Local copy of the Drive folders the bot serves, kept current from the
+-- Drive changes feed (see drive/index.py).
+
+CREATE TABLE IF NOT EXISTS drive_item (
+    id              TEXT PRIMARY KEY,
+    name            TEXT NOT NULL,
+    parents         TEXT[] NOT NULL DEFAULT '{}',
+    mime_type       TEXT NOT NULL,
+    web_view_link   TEXT NOT NULL,
+    md5             TEXT
+);
+CREATE INDEX IF NOT EXISTS drive_item_md5_idx
+    ON drive_item (md5) WHERE md5 IS NOT NULL;
+
+-- A single row holding the changes feed position
+CREATE TABLE IF NOT EXISTS drive_sync (
+    id          BOOLEAN PRIMARY KEY DEFAULT true CHECK (id),
+    page_token  TEXT NOT NULL
+);
@@ -0,0 +1,8 @@
+-- A member who verifies again with another roll number is moved off their old
+-- student row by `verify_student`, which sets the new row and clears the old
+-- one in a single statement. A unique index would be checked row by row during
+-- that update, so it is replaced with a plain one.
+
+DROP INDEX IF EXISTS student_discord_id_idx;
+CREATE INDEX student_discord_id_idx
+    ON student (discord_id);
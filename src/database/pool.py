@@ -0,0 +1,249 @@
+"""An instrumented drop-in replacement for `asyncpg.Pool`.
+
+Every statement run on a pool connection is timed through a query logger that
+is installed in the pool's `init` hook, so queries made on acquired connections
+are covered as well. The wrapper itself adds row counts and acquire wait times.
+Queries are attributed to the command or listener that is currently being
+traced (see `utils.tracing`).
+
+The same hook prepares every statement in `database.queries` on each new
+connection; those are run with `InstrumentedPool.run`. Prepared statements
+never reach the query loggers, so `run` times them itself, under the query's
+name.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from typing import Any, Awaitable, Callable, TypeVar
+
+import asyncpg
+from asyncpg.prepared_stmt import PreparedStatement
+
+import config
+from database.queries import REGISTRY, Query
+from utils import metrics, tracing
+
+T = TypeVar("T")
+
+ACQUIRE_WAIT = metrics.Histogram(
+    "hyperlink_db_pool_acquire_seconds",
+    "Time spent waiting for a connection from the pool",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+)
+QUERY_ROWS = metrics.Histogram(
+    "hyperlink_db_query_rows",
+    "Rows returned or affected by a statement run through the pool",
+    ("statement",),
+    buckets=(0, 1, 5, 10, 50, 100, 500, 1000, 5000),
+)
+QUERIES = metrics.Counter(
+    "hyperlink_db_queries_total",
+    "Statements run, by the command or listener that issued them",
+    ("source",),
+)
+POOL_SIZE = metrics.Gauge(
+    "hyperlink_db_pool_connections",
+    "Connections held by the pool",
+    ("state",),
+)
+
+# Metrics are labelled by the name of a statement from `database.queries`;
+# every other statement shares this label, so that ad-hoc SQL (the `/sql`
+# console included) can never grow the label sets without bound
+ADHOC = "adhoc"
+
+logger = logging.getLogger("ProjectHyperlink")
+
+
+def _observe(label: str, statement: str, elapsed: float, failed: bool) -> None:
+    """Record a statement's latency, count it and log it if it was slow"""
+    trace = tracing.current()
+    source = trace.name if trace is not None else "background"
+
+    metrics.QUERY_LATENCY.labels(label, "error" if failed else "ok").observe(
+        elapsed
+    )
+    QUERIES.labels(source).inc()
+    if trace is not None:
+        trace.queries += 1
+        trace.record(f"db: {statement}", elapsed)
+
+    if elapsed >= config.SLOW_QUERY_THRESHOLD:
+        logger.warning(
+            f"Slow query took {elapsed * 1000:.0f}ms",
+            extra={
+                "fields": {
+                    "Statement": f"```sql\n{statement}```",
+                    "Source": f"`{source}`",
+                }
+            },
+        )
+
+
+def _row_count(result: Any) -> int:
+    if isinstance(result, list):
+        return len(result)
+    if isinstance(result, str):
+        # Status tags look like `UPDATE 3` or `INSERT 0 1`
+        count = result.rsplit(" ", 1)[-1]
+        return int(count) if count.isdigit() else 0
+    return 0 if result is None else 1
+
+
+class HyperlinkConnection(asyncpg.Connection):
+    """A connection that holds the prepared statements from `database.queries`"""
+
+    statements: dict[str, PreparedStatement]
+
+    def _log_query(self, record: asyncpg.connection.LoggedQuery) -> None:
+        # The pool resets every connection it is handed back; that is not a
+        # query anything issued
+        if record.query == self.get_reset_query():
+            return
+        statement = metrics.normalize_statement(record.query)
+        _observe(ADHOC, statement, record.elapsed, record.exception is not None)
+
+    async def prepare_registry(self) -> None:
+        self.statements = {}
+        for query in REGISTRY.values():
+            self.statements[query.name] = await self.prepare(query.sql)
+
+    async def _run_prepared(self, query: Query[T], *args: Any) -> T:
+        statement = self.statements[query.name]
+        if query.kind == "execute":
+            await statement.fetch(*args)
+            return statement.get_statusmsg()
+        return await getattr(statement, query.kind)(*args)
+
+    async def _run_timed(self, query: Query[T], *args: Any) -> T:
+        # Prepared statements bypass the query loggers, so they are timed here
+        start = time.perf_counter()
+        failed = True
+        try:
+            result = await self._run_prepared(query, *args)
+            failed = False
+            return result
+        finally:
+            _observe(query.name, query.name, time.perf_counter() - start, failed)
+
+    async def run(self, query: Query[T], *args: Any) -> T:
+        try:
+            return await self._run_timed(query, *args)
+        except asyncpg.InvalidCachedStatementError:
+            # The schema changed under the statement; prepare it again
+            self.statements[query.name] = await self.prepare(query.sql)
+            return await self._run_timed(query, *args)
+
+
+class _AcquireContext:
+    def __init__(self, context: asyncpg.pool.PoolAcquireContext):
+        self._context = context
+
+    async def __aenter__(self) -> asyncpg.Connection:
+        start = time.perf_counter()
+        connection = await self._context.__aenter__()
+        ACQUIRE_WAIT.observe(time.perf_counter() - start)
+        return connection
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self._context.__aexit__(*exc_info)
+
+    def __await__(self):
+        async def acquire() -> asyncpg.Connection:
+            start = time.perf_counter()
+            connection = await self._context
+            ACQUIRE_WAIT.observe(time.perf_counter() - start)
+            return connection
+
+        return acquire().__await__()
+
+
+class InstrumentedPool:
+    """Wraps an `asyncpg.Pool`; anything not overridden here is passed through"""
+
+    def __init__(self, pool: asyncpg.Pool):
+        self._pool = pool
+
+        POOL_SIZE.labels("total").set_function(pool.get_size)
+        POOL_SIZE.labels("idle").set_function(pool.get_idle_size)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._pool, name)
+
+    def __await__(self):
+        async def init() -> InstrumentedPool:
+            await self._pool
+            return self
+
+        return init().__await__()
+
+    async def __aenter__(self) -> InstrumentedPool:
+        await self._pool.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self._pool.__aexit__(*exc_info)
+
+    def acquire(self, *, timeout: float | None = None) -> _AcquireContext:
+        return _AcquireContext(self._pool.acquire(timeout=timeout))
+
+    async def _run(
+        self,
+        method: Callable[[asyncpg.Connection], Callable[..., Awaitable[Any]]],
+        query: str,
+        *args: Any,
+        **kwargs: Any,
+    ) -> Any:
+        async with self.acquire() as connection:
+            result = await method(connection)(query, *args, **kwargs)
+        QUERY_ROWS.labels(ADHOC).observe(_row_count(result))
+        return result
+
+    async def execute(self, query: str, *args: Any, timeout: float | None = None):
+        return await self._run(lambda c: c.execute, query, *args, timeout=timeout)
+
+    async def executemany(
+        self, command: str, args: Any, *, timeout: float | None = None
+    ) -> None:
+        async with self.acquire() as connection:
+            await connection.executemany(command, args, timeout=timeout)
+
+    async def fetch(self, query: str, *args: Any, **kwargs: Any) -> list:
+        return await self._run(lambda c: c.fetch, query, *args, **kwargs)
+
+    async def fetchrow(self, query: str, *args: Any, **kwargs: Any):
+        return await self._run(lambda c: c.fetchrow, query, *args, **kwargs)
+
+    async def fetchval(self, query: str, *args: Any, **kwargs: Any):
+        return await self._run(lambda c: c.fetchval, query, *args, **kwargs)
+
+    async def run(self, query: Query[T], *args: Any) -> T:
+        """Run a named statement from `database.queries`"""
+        async with self.acquire() as connection:
+            result = await connection.run(query, *args)
+        QUERY_ROWS.labels(query.name).observe(_row_count(result))
+        return result
+
+
+def create_pool(dsn: str, **kwargs: Any) -> InstrumentedPool:
+    """Same as `asyncpg.create_pool`, but returns an `InstrumentedPool`"""
+    init: Callable[[asyncpg.Connection], Awaitable[None]] | None = kwargs.pop(
+        "init", None
+    )
+
+    async def init_connection(connection: HyperlinkConnection) -> None:
+        connection.add_query_logger(connection._log_query)
+        await connection.prepare_registry()
+        if init is not None:
+            await init(connection)
+
+    return InstrumentedPool(
+        asyncpg.create_pool(
+            dsn,
+            init=init_connection,
+            connection_class=HyperlinkConnection,
+            **kwargs,
+        )
+    )
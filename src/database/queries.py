@@ -0,0 +1,169 @@
+"""Named statements for every hot query the bot runs.
+
+Each `Query` is prepared once on every pool connection (in the pool's `init`
+hook) and run by name through `InstrumentedPool.run`, so the hot path never
+pays for parsing or planning. The type parameter is the result of running the
+statement, which lets call sites stay typed.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Generic, Literal, TypeVar
+
+from asyncpg import Record
+
+T = TypeVar("T")
+
+REGISTRY: dict[str, Query] = {}
+
+
+@dataclass(frozen=True)
+class Query(Generic[T]):
+    name: str
+    sql: str
+    kind: Literal["execute", "fetch", "fetchrow", "fetchval"]
+
+    def __post_init__(self):
+        if self.name in REGISTRY:
+            raise ValueError(f"Query `{self.name}` is already registered")
+        REGISTRY[self.name] = self
+
+
+# bot_prefix
+PREFIXES: Query[list[Record]] = Query(
+    "prefixes",
+    "SELECT prefix FROM bot_prefix WHERE guild_id = $1",
+    "fetch",
+)
+ADD_PREFIX: Query[str] = Query(
+    "add_prefix",
+    "INSERT INTO bot_prefix (guild_id, prefix) VALUES ($1, $2)",
+    "execute",
+)
+REMOVE_PREFIX: Query[str] = Query(
+    "remove_prefix",
+    "DELETE FROM bot_prefix WHERE guild_id = $1 AND prefix = $2",
+    "execute",
+)
+CLEAR_PREFIXES: Query[str] = Query(
+    "clear_prefixes",
+    "DELETE FROM bot_prefix WHERE guild_id = $1",
+    "execute",
+)
+
+# guild
+# The queries below take an array of guild ids and are run through a `Loader`
+GUILDS: Query[list[Record]] = Query(
+    "guilds",
+    "SELECT id, locale, bot_role FROM guild WHERE id = ANY($1)",
+    "fetch",
+)
+
+# guild_event
+GUILD_EVENTS: Query[list[Record]] = Query(
+    "guild_events",
+    """
+    SELECT
+        guild_id,
+        event_type,
+        channel_id,
+        message
+    FROM
+        guild_event
+    WHERE
+        guild_id = ANY($1)
+    """,
+    "fetch",
+)
+
+# join_role
+JOIN_ROLES: Query[list[Record]] = Query(
+    "join_roles",
+    "SELECT guild_id, role_id FROM join_role WHERE guild_id = ANY($1)",
+    "fetch",
+)
+DELETE_JOIN_ROLES: Query[str] = Query(
+    "delete_join_roles",
+    "DELETE FROM join_role WHERE role_id = ANY($1)",
+    "execute",
+)
+
+# guild_role
+GUILD_ROLES: Query[list[Record]] = Query(
+    "guild_roles",
+    """
+    SELECT
+        guild_id,
+        field,
+        value,
+        role_ids
+    FROM
+        guild_role
+    WHERE
+        guild_id = ANY($1)
+    """,
+    "fetch",
+)
+
+# student
+STUDENT_DISCORD_ID: Query[int | None] = Query(
+    "student_discord_id",
+    "SELECT discord_id FROM student WHERE roll_number = $1",
+    "fetchval",
+)
+STUDENT_NAME: Query[str | None] = Query(
+    "student_name",
+    "SELECT name FROM student WHERE discord_id = $1",
+    "fetchval",
+)
+# Links a member to a student, and unlinks them from any student they were
+# linked to before. Returns every student whose link changed.
+VERIFY_STUDENT: Query[list[Record]] = Query(
+    "verify_student",
+    """
+    UPDATE
+        student
+    SET
+        discord_id = CASE WHEN roll_number = $2 THEN $1 END,
+        is_verified = CASE WHEN roll_number = $2 THEN true ELSE false END
+    WHERE
+        roll_number = $2 OR discord_id = $1
+    RETURNING
+        roll_number, batch, section
+    """,
+    "fetch",
+)
+
+# Counts of students per section, kept in memory for `/memlist`
+BATCH_STATS: Query[list[Record]] = Query(
+    "batch_stats",
+    """
+    SELECT
+        batch,
+        section,
+        COUNT(discord_id) AS joined,
+        COUNT(*) - COUNT(discord_id) AS remaining,
+        COUNT(*) FILTER (WHERE is_verified) AS verified
+    FROM
+        student
+    GROUP BY
+        batch,
+        section
+    """,
+    "fetch",
+)
+SECTION_STATS: Query[Record | None] = Query(
+    "section_stats",
+    """
+    SELECT
+        COUNT(discord_id) AS joined,
+        COUNT(*) - COUNT(discord_id) AS remaining,
+        COUNT(*) FILTER (WHERE is_verified) AS verified
+    FROM
+        student
+    WHERE
+        batch = $1 AND section = $2
+    """,
+    "fetchrow",
+)
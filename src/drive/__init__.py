@@ -0,0 +1,20 @@
+"""The Google Drive behind `/drive`: the API client, a local index of the
+folders the bot serves, uploads and bulk ingestion of past papers.
+
+Kept apart from the cog so that it can be used without a running bot, like
+the `python -m drive.ingest` command line.
+"""
+
+from .client import DriveError, GoogleDrive
+from .folders import FolderCache, FolderResolver
+from .index import DriveIndex, DriveItem, DriveSource
+
+__all__ = (
+    "DriveError",
+    "DriveIndex",
+    "DriveItem",
+    "DriveSource",
+    "FolderCache",
+    "FolderResolver",
+    "GoogleDrive",
+)
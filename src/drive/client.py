@@ -0,0 +1,364 @@
+"""A non-blocking Google Drive client.
+
+Talks to the Drive v3 REST API over the bot's aiohttp session instead of going
+through `googleapiclient`, whose `.execute()` blocks the event loop (and with
+it, gateway heartbeats) for as long as Google takes to answer. Every call has a
+timeout, is bounded by a semaphore so a burst of searches cannot open an
+unbounded number of requests, and is timed per operation.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from typing import Any, Awaitable, Callable
+from urllib.parse import quote
+
+import aiohttp
+
+import config
+from utils import metrics, tracing
+
+API_URL = "https://www.googleapis.com/drive/v3"
+UPLOAD_URL = "https://www.googleapis.com/upload/drive/v3"
+BATCH_URL = "https://www.googleapis.com/batch/drive/v3"
+TOKEN_URL = "https://oauth2.googleapis.com/token"
+SCOPES = ("https://www.googleapis.com/auth/drive",)
+
+FOLDER_MIME_TYPE = "application/vnd.google-apps.folder"
+ITEM_FIELDS = "id, name, parents, mimeType, webViewLink, md5Checksum, trashed"
+# The most calls that Drive accepts in a single batch request
+BATCH_LIMIT = 100
+
+DRIVE_LATENCY = metrics.Histogram(
+    "hyperlink_drive_request_duration_seconds",
+    "Time taken by a Google Drive API call",
+    ("operation", "status"),
+)
+
+
+class DriveError(Exception):
+    """Raised when the Drive API returns an error or does not answer in time"""
+
+    def __init__(self, operation: str, status: int | None, message: str):
+        self.operation = operation
+        self.status = status
+        super().__init__(f"{operation} failed ({status or 'no status'}): {message}")
+
+
+def quote_query(value: str) -> str:
+    """Quote a string for use in a Drive search query"""
+    escaped = value.replace("\\", "\\\\").replace("'", "\\'")
+    return f"'{escaped}'"
+
+
+async def _read_json(resp: aiohttp.ClientResponse) -> Any:
+    return await resp.json()
+
+
+async def _read_batch(resp: aiohttp.ClientResponse) -> list[tuple[int, int, Any]]:
+    """Split a batch response into (content id, status, JSON body) triples"""
+    results = []
+    reader = aiohttp.MultipartReader.from_response(resp)
+    while (part := await reader.next()) is not None:
+        assert isinstance(part, aiohttp.BodyPartReader)
+        # Each part is a raw HTTP response: a status line, headers, then a body
+        status_line, _, rest = (await part.text()).partition("\r\n")
+        _, _, body = rest.partition("\r\n\r\n")
+        content_id = part.headers.get("Content-ID", "").strip("<>")
+        results.append(
+            (
+                int(content_id.rsplit("-", 1)[-1]),
+                int(status_line.split()[1]),
+                json.loads(body) if body.strip() else None,
+            )
+        )
+    return results
+
+
+async def _read_location(resp: aiohttp.ClientResponse) -> str:
+    return resp.headers["Location"]
+
+
+async def _read_upload(resp: aiohttp.ClientResponse) -> dict[str, Any] | int:
+    """Return the uploaded item, or the number of bytes committed so far"""
+    if resp.status in (200, 201):
+        return await resp.json()
+
+    # 308 Resume Incomplete, with the committed bytes as `Range: bytes=0-<last>`
+    if range := resp.headers.get("Range"):
+        return int(range.rsplit("-", 1)[-1]) + 1
+    return 0
+
+
+def authorize() -> None:
+    """Run the OAuth consent flow once to obtain a refresh token"""
+    from google_auth_oauthlib.flow import InstalledAppFlow
+
+    flow = InstalledAppFlow.from_client_config(config.google_client_config, SCOPES)
+    creds = flow.run_local_server(port=0)
+    print(
+        "Set the environment variable GOOGLE_REFRESH_TOKEN to",
+        json.loads(creds.to_json())["refresh_token"],
+        "and run this program again.",
+    )
+    exit(1)
+
+
+class GoogleDrive:
+    """Drive API functions"""
+
+    root = "1U2taK5kEhOiUJi70ZkU2aBWY83uVuMmD"
+    past_papers = "13dMpIfa1FPiAdNThWdkSXfhXLK3BL-kn"
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        *,
+        timeout: float = 20.0,
+        max_concurrency: int = 8,
+    ):
+        if not config.GOOGLE_REFRESH_TOKEN:
+            authorize()
+
+        self.session = session
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._token: str | None = None
+        self._token_expiry = 0.0
+        self._token_lock = asyncio.Lock()
+
+    async def _access_token(self, *, refresh: bool = False) -> str:
+        async with self._token_lock:
+            expired = time.monotonic() > self._token_expiry
+            if refresh or self._token is None or expired:
+                payload = {
+                    "client_id": config.GOOGLE_CLIENT_ID,
+                    "client_secret": config.GOOGLE_CLIENT_SECRET,
+                    "refresh_token": config.GOOGLE_REFRESH_TOKEN,
+                    "grant_type": "refresh_token",
+                }
+                try:
+                    async with self.session.post(
+                        TOKEN_URL, data=payload, timeout=self.timeout
+                    ) as resp:
+                        body = await resp.json()
+                        if resp.status != 200:
+                            raise DriveError(
+                                "token", resp.status, body.get("error", "unknown")
+                            )
+                except asyncio.TimeoutError:
+                    raise DriveError("token", None, "no response") from None
+
+                self._token = body["access_token"]
+                # Refresh a minute early so that a token never expires mid-request
+                self._token_expiry = time.monotonic() + body["expires_in"] - 60
+            assert self._token is not None
+            return self._token
+
+    async def request(
+        self,
+        operation: str,
+        method: str,
+        url: str,
+        *,
+        timeout: float | None = None,
+        read: Callable[[aiohttp.ClientResponse], Awaitable[Any]] = _read_json,
+        **kwargs: Any,
+    ) -> Any:
+        """Make an authorized request and return the response read by `read`"""
+        client_timeout = (
+            self.timeout if timeout is None else aiohttp.ClientTimeout(total=timeout)
+        )
+        status = "error"
+        start = time.perf_counter()
+        try:
+            async with self._semaphore:
+                with tracing.span(f"drive: {operation}"):
+                    headers = kwargs.pop("headers", {})
+                    for attempt in range(2):
+                        token = await self._access_token(refresh=attempt > 0)
+                        async with self.session.request(
+                            method,
+                            url,
+                            headers={**headers, "Authorization": f"Bearer {token}"},
+                            timeout=client_timeout,
+                            **kwargs,
+                        ) as resp:
+                            status = str(resp.status)
+                            # The access token was revoked early; get a new one once
+                            if resp.status == 401 and attempt == 0:
+                                continue
+                            if resp.status >= 400:
+                                raise DriveError(
+                                    operation, resp.status, await resp.text()
+                                )
+                            return await read(resp)
+        except asyncio.TimeoutError:
+            status = "timeout"
+            raise DriveError(operation, None, "no response") from None
+        except aiohttp.ClientError as error:
+            raise DriveError(operation, None, str(error)) from error
+        finally:
+            DRIVE_LATENCY.labels(operation, status).observe(
+                time.perf_counter() - start
+            )
+
+    async def get_item(self, id: str) -> dict[str, Any]:
+        """Return item details corresponding to a given ID"""
+        return await self.request(
+            "files.get",
+            "GET",
+            f"{API_URL}/files/{id}",
+            params={"fields": ITEM_FIELDS},
+        )
+
+    async def get_items(self, ids: list[str]) -> dict[str, dict[str, Any]]:
+        """Return details for many items, a hundred per round trip.
+
+        Items that could not be fetched are left out.
+        """
+        items = {}
+        fields = quote(ITEM_FIELDS)
+        for start in range(0, len(ids), BATCH_LIMIT):
+            chunk = ids[start : start + BATCH_LIMIT]
+            with aiohttp.MultipartWriter("mixed") as body:
+                for i, id in enumerate(chunk):
+                    body.append(
+                        f"GET /drive/v3/files/{id}?fields={fields}\r\n",
+                        {"Content-Type": "application/http", "Content-ID": f"<{i}>"},
+                    )
+
+            results = await self.request(
+                "batch", "POST", BATCH_URL, data=body, read=_read_batch
+            )
+            for i, status, item in results:
+                if status == 200:
+                    items[chunk[i]] = item
+        return items
+
+    async def list_items(self, query: str) -> list[dict[str, Any]]:
+        """Return all items matching the given query"""
+        params = {
+            "q": query,
+            "fields": f"nextPageToken, files({ITEM_FIELDS})",
+            "pageSize": "1000",
+        }
+        files = []
+        while True:
+            response = await self.request(
+                "files.list", "GET", f"{API_URL}/files", params=params
+            )
+            files.extend(response.get("files", []))
+            if not (page_token := response.get("nextPageToken")):
+                return files
+            params["pageToken"] = page_token
+
+    async def create_folder(self, name: str, parent_id: str) -> dict[str, Any]:
+        """Create a folder on the Drive"""
+        return await self.request(
+            "files.create",
+            "POST",
+            f"{API_URL}/files",
+            params={"fields": ITEM_FIELDS},
+            json={"name": name, "parents": [parent_id], "mimeType": FOLDER_MIME_TYPE},
+        )
+
+    async def rename(self, id: str, name: str) -> dict[str, Any]:
+        """Rename an item"""
+        return await self.request(
+            "files.update",
+            "PATCH",
+            f"{API_URL}/files/{id}",
+            params={"fields": ITEM_FIELDS},
+            json={"name": name},
+        )
+
+    async def start_upload(
+        self, name: str, parent_id: str, mime_type: str, size: int
+    ) -> str:
+        """Open a resumable upload session and return its URL"""
+        return await self.request(
+            "files.create (start upload)",
+            "POST",
+            f"{UPLOAD_URL}/files",
+            params={"uploadType": "resumable", "fields": ITEM_FIELDS},
+            json={"name": name, "parents": [parent_id]},
+            headers={
+                "X-Upload-Content-Type": mime_type,
+                "X-Upload-Content-Length": str(size),
+            },
+            read=_read_location,
+        )
+
+    async def upload_chunk(
+        self, session_url: str, chunk: bytes, offset: int, size: int
+    ) -> tuple[int, dict[str, Any] | None]:
+        """Send part of a file to an upload session.
+
+        Returns how many bytes Drive has committed so far, and the uploaded item
+        once the last byte is in.
+        """
+        end = offset + len(chunk) - 1
+        result = await self.request(
+            "files.create (upload chunk)",
+            "PUT",
+            session_url,
+            data=chunk,
+            headers={"Content-Range": f"bytes {offset}-{end}/{size}"},
+            allow_redirects=False,
+            timeout=120.0,
+            read=_read_upload,
+        )
+        if isinstance(result, dict):
+            return size, result
+        return result, None
+
+    async def upload_status(
+        self, session_url: str, size: int
+    ) -> tuple[int, dict[str, Any] | None]:
+        """Ask Drive how far an interrupted upload got.
+
+        Returns the same as `upload_chunk`: an upload whose last chunk went
+        through before the connection failed is already complete, and Drive
+        answers with the uploaded item.
+        """
+        result = await self.request(
+            "files.create (upload status)",
+            "PUT",
+            session_url,
+            headers={"Content-Range": f"bytes */{size}"},
+            allow_redirects=False,
+            read=_read_upload,
+        )
+        if isinstance(result, dict):
+            return size, result
+        return result, None
+
+    async def get_start_page_token(self) -> str:
+        """Return the token for changes made from now on"""
+        response = await self.request(
+            "changes.getStartPageToken", "GET", f"{API_URL}/changes/startPageToken"
+        )
+        return response["startPageToken"]
+
+    async def list_changes(self, page_token: str) -> tuple[list[dict[str, Any]], str]:
+        """Return every change since `page_token` and the token to resume from"""
+        params = {
+            "pageToken": page_token,
+            "fields": (
+                "nextPageToken, newStartPageToken, "
+                f"changes(fileId, removed, file({ITEM_FIELDS}))"
+            ),
+            "pageSize": "1000",
+        }
+        changes = []
+        while True:
+            response = await self.request(
+                "changes.list", "GET", f"{API_URL}/changes", params=params
+            )
+            changes.extend(response.get("changes", []))
+            if new_token := response.get("newStartPageToken"):
+                return changes, new_token
+            params["pageToken"] = response["nextPageToken"]
@@ -0,0 +1,179 @@
+"""Folder lookups for search results and uploads.
+
+Most folders are already in the local `DriveIndex`. For search results, the
+rest (the parents of shared shortcuts, or anything looked up before the index
+is built) are fetched with one batch request and cached; cached entries older
+than the TTL are still served, and refreshed in the background.
+
+Upload paths are resolved segment by segment against the index as well, so
+only missing folders cost a request, to create them.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Iterable
+
+from utils import metrics
+
+from .client import FOLDER_MIME_TYPE, DriveError, GoogleDrive, quote_query
+from .index import DriveIndex, DriveItem
+
+logger = logging.getLogger("ProjectHyperlink")
+
+
+class FolderCache:
+    def __init__(self, drive: GoogleDrive, index: DriveIndex, *, ttl: float = 3600.0):
+        self.drive = drive
+        self.index = index
+        self.ttl = ttl
+        self._entries: dict[str, tuple[float, DriveItem]] = {}
+        self._refreshing: set[str] = set()
+        self._tasks: set[asyncio.Task] = set()
+
+    async def _fetch(self, ids: list[str]) -> dict[str, DriveItem]:
+        fetched = {
+            id: DriveItem.from_api(item)
+            for id, item in (await self.drive.get_items(ids)).items()
+        }
+        now = time.monotonic()
+        for id, item in fetched.items():
+            self._entries[id] = (now, item)
+        return fetched
+
+    async def _refresh(self, ids: list[str]) -> None:
+        try:
+            await self._fetch(ids)
+        except DriveError as error:
+            logger.warning(f"Refreshing cached Drive folders failed: {error}")
+        finally:
+            self._refreshing.difference_update(ids)
+
+    async def get_many(self, ids: Iterable[str]) -> dict[str, DriveItem]:
+        """Return whichever of the folders could be found, by id"""
+        found: dict[str, DriveItem] = {}
+        missing: list[str] = []
+        stale: list[str] = []
+        now = time.monotonic()
+        for id in dict.fromkeys(ids):
+            if (item := self.index.get(id)) is not None:
+                found[id] = item
+            elif (entry := self._entries.get(id)) is not None:
+                fetched_at, found[id] = entry
+                if now - fetched_at > self.ttl and id not in self._refreshing:
+                    stale.append(id)
+            else:
+                missing.append(id)
+            metrics.cache_lookup("drive_folder", id in found)
+
+        if stale:
+            self._refreshing.update(stale)
+            task = asyncio.create_task(self._refresh(stale))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+        if missing:
+            found.update(await self._fetch(missing))
+        return found
+
+    async def get(self, id: str) -> DriveItem:
+        if (item := (await self.get_many([id])).get(id)) is None:
+            raise DriveError("batch", 404, f"folder {id} not found")
+        return item
+
+
+class FolderResolver:
+    """Resolves folder paths, preferring the index over queries to Drive.
+
+    Until the index is built, lookups go to Drive, and the folders found or
+    created are remembered so that a session of uploads into the same tree
+    only looks each folder up once.
+    """
+
+    def __init__(self, drive: GoogleDrive, index: DriveIndex):
+        self.drive = drive
+        self.index = index
+        self._children: dict[tuple[str, str], DriveItem] = {}
+
+    async def child(self, parent_id: str, name: str) -> DriveItem | None:
+        """Return the folder with this name inside another"""
+        if self.index.ready.is_set():
+            return self.index.find_child(parent_id, name, folder=True)
+        if (folder := self._children.get((parent_id, name))) is not None:
+            return folder
+
+        files = await self.drive.list_items(
+            f"name = {quote_query(name)} and mimeType = '{FOLDER_MIME_TYPE}' "
+            f"and {quote_query(parent_id)} in parents and trashed = false"
+        )
+        if not files:
+            return None
+        folder = self._children[parent_id, name] = DriveItem.from_api(files[0])
+        return folder
+
+    async def find(self, parent_id: str, keyword: str) -> DriveItem | None:
+        """Return a folder inside another whose name contains a keyword"""
+        if self.index.ready.is_set():
+            for child_id in self.index.children.get(parent_id, ()):
+                child = self.index.items[child_id]
+                if child.is_folder and keyword.casefold() in child.name.casefold():
+                    return child
+            return None
+
+        files = await self.drive.list_items(
+            f"name contains {quote_query(keyword)} and "
+            f"mimeType = '{FOLDER_MIME_TYPE}' and "
+            f"{quote_query(parent_id)} in parents and trashed = false"
+        )
+        return DriveItem.from_api(files[0]) if files else None
+
+    async def create(self, parent_id: str, name: str) -> DriveItem:
+        folder = DriveItem.from_api(await self.drive.create_folder(name, parent_id))
+        self._children[parent_id, name] = folder
+        # Make it visible right away, rather than after the next changes sync
+        if self.index.ready.is_set():
+            self.index.add(folder)
+        return folder
+
+    async def resolve(
+        self,
+        parent: DriveItem,
+        path: Iterable[str],
+        confirm: Callable[[str], Awaitable[bool]] | None = None,
+    ) -> list[DriveItem] | None:
+        """Return the folders along a path, creating the ones that are missing.
+
+        `confirm` is asked before each folder is created; if it refuses,
+        nothing more is created and `None` is returned.
+        """
+        folders = []
+        for name in path:
+            folder = await self.child(parent.id, name)
+            if folder is None:
+                if confirm is not None and not await confirm(name):
+                    return None
+                folder = await self.create(parent.id, name)
+            folders.append(folder)
+            parent = folder
+        return folders
+
+    async def existing_names(self, parent_id: str, names: Iterable[str]) -> set[str]:
+        """Return which of the names are already taken by files in a folder"""
+        names = set(names)
+        if not names:
+            return set()
+        if self.index.ready.is_set():
+            return {
+                name
+                for name in names
+                if self.index.find_child(parent_id, name, folder=False) is not None
+            }
+
+        matches = " or ".join(f"name = {quote_query(name)}" for name in names)
+        files = await self.drive.list_items(
+            f"({matches}) and {quote_query(parent_id)} in parents "
+            f"and mimeType != '{FOLDER_MIME_TYPE}' and trashed = false"
+        )
+        return {file["name"] for file in files} & names
@@ -0,0 +1,263 @@
+"""A local index of the Drive folders that the bot serves.
+
+The notes and past papers trees are listed once, stored in Postgres, and then
+kept current from the Drive changes feed, so searches never wait on Google.
+The index only needs something that behaves like `GoogleDrive` for the calls in
+`DriveSource`, which makes it easy to run against a fake.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Iterable, Iterator, Protocol
+
+from database import InstrumentedPool
+from utils.search import NameIndex
+
+from .client import FOLDER_MIME_TYPE
+
+# The Drive API caps query strings, so folders are listed a chunk at a time
+LIST_CHUNK_SIZE = 40
+
+logger = logging.getLogger("ProjectHyperlink")
+
+
+class DriveSource(Protocol):
+    async def get_item(self, id: str) -> dict[str, Any]:
+        ...
+
+    async def list_items(self, query: str) -> list[dict[str, Any]]:
+        ...
+
+    async def get_start_page_token(self) -> str:
+        ...
+
+    async def list_changes(self, page_token: str) -> tuple[list[dict[str, Any]], str]:
+        ...
+
+
+@dataclass
+class DriveItem:
+    id: str
+    name: str
+    parents: list[str]
+    mime_type: str
+    web_view_link: str
+    md5: str | None = None
+
+    @classmethod
+    def from_api(cls, file: dict[str, Any]) -> DriveItem:
+        return cls(
+            file["id"],
+            file["name"],
+            file.get("parents", []),
+            file["mimeType"],
+            file["webViewLink"],
+            file.get("md5Checksum"),
+        )
+
+    @property
+    def is_folder(self) -> bool:
+        return self.mime_type == FOLDER_MIME_TYPE
+
+    @property
+    def download_link(self) -> str:
+        return f"https://docs.google.com/uc?export=download&id={self.id}"
+
+
+class DriveIndex:
+    """Drive items under `roots`, by id"""
+
+    def __init__(
+        self, pool: InstrumentedPool, source: DriveSource, roots: tuple[str, ...]
+    ):
+        self.pool = pool
+        self.source = source
+        self.roots = roots
+        self.items: dict[str, DriveItem] = {}
+        self.children: dict[str, set[str]] = {}
+        self.names: NameIndex[str] = NameIndex()
+        self.page_token: str | None = None
+        self.ready = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def get(self, id: str) -> DriveItem | None:
+        return self.items.get(id)
+
+    def walk(self, folder_id: str) -> Iterator[DriveItem]:
+        """Yield every item below a folder"""
+        for child_id in self.children.get(folder_id, ()):
+            child = self.items[child_id]
+            yield child
+            if child.is_folder:
+                yield from self.walk(child_id)
+
+    def find_child(
+        self, parent_id: str, name: str, *, folder: bool | None = None
+    ) -> DriveItem | None:
+        """Return the item with this exact name directly inside a folder"""
+        for child_id in self.children.get(parent_id, ()):
+            child = self.items[child_id]
+            if child.name == name and folder in (None, child.is_folder):
+                return child
+        return None
+
+    def search(self, query: str, limit: int = 25) -> list[DriveItem]:
+        """Return the items whose names best match the query"""
+        return [self.items[id] for id, _ in self.names.search(query, limit)]
+
+    def add(self, item: DriveItem) -> None:
+        if (old := self.items.get(item.id)) is not None:
+            for parent in old.parents:
+                self.children.get(parent, set()).discard(item.id)
+        self.items[item.id] = item
+        self.names.add(item.id, item.name)
+        for parent in item.parents:
+            self.children.setdefault(parent, set()).add(item.id)
+
+    def _remove(self, id: str) -> list[str]:
+        """Remove an item and everything below it, returning the removed ids"""
+        if (item := self.items.pop(id, None)) is None:
+            return []
+        self.names.remove(id)
+        for parent in item.parents:
+            self.children.get(parent, set()).discard(id)
+
+        removed = [id]
+        for child_id in list(self.children.pop(id, ())):
+            removed.extend(self._remove(child_id))
+        return removed
+
+    def _in_tree(self, item: DriveItem) -> bool:
+        return item.id in self.roots or any(
+            parent in self.roots or parent in self.items for parent in item.parents
+        )
+
+    async def load(self) -> None:
+        """Load the index from the database, building it from Drive if needed"""
+        self.page_token = await self.pool.fetchval(
+            "SELECT page_token FROM drive_sync"
+        )
+        if self.page_token is None:
+            await self.bootstrap()
+        else:
+            rows = await self.pool.fetch(
+                """
+                SELECT
+                    id,
+                    name,
+                    parents,
+                    mime_type,
+                    web_view_link,
+                    md5
+                FROM
+                    drive_item
+                """
+            )
+            for row in rows:
+                self.add(DriveItem(**row))
+            await self.sync()
+
+        self.ready.set()
+        logger.info(f"Drive index loaded with {len(self)} items")
+
+    async def bootstrap(self) -> None:
+        """List the whole tree under the roots and start following changes"""
+        # Take the token first so that nothing changed during the listing is lost
+        page_token = await self.source.get_start_page_token()
+
+        self.items.clear()
+        self.children.clear()
+        self.names = NameIndex()
+        for root in self.roots:
+            self.add(DriveItem.from_api(await self.source.get_item(root)))
+
+        folders = list(self.roots)
+        while folders:
+            chunk, folders = folders[:LIST_CHUNK_SIZE], folders[LIST_CHUNK_SIZE:]
+            parents = " or ".join(f"'{id}' in parents" for id in chunk)
+            query = f"({parents}) and trashed = false"
+            for file in await self.source.list_items(query):
+                item = DriveItem.from_api(file)
+                self.add(item)
+                if item.is_folder:
+                    folders.append(item.id)
+
+        async with self.pool.acquire() as connection, connection.transaction():
+            await connection.execute("DELETE FROM drive_item")
+            await self._save(connection, self.items.values(), [], page_token)
+        self.page_token = page_token
+
+    async def sync(self) -> int:
+        """Apply changes made since the last sync and return how many were applied"""
+        assert self.page_token is not None
+        changes, page_token = await self.source.list_changes(self.page_token)
+
+        upserted: dict[str, DriveItem] = {}
+        removed: list[str] = []
+        pending: list[DriveItem] = []
+        for change in changes:
+            file = change.get("file")
+            if change.get("removed") or file is None or file.get("trashed"):
+                removed.extend(self._remove(change["fileId"]))
+            else:
+                pending.append(DriveItem.from_api(file))
+
+        # A new folder and its contents can arrive in any order; keep placing
+        # items until nothing else attaches to the tree
+        while pending:
+            placed = [item for item in pending if self._in_tree(item)]
+            if not placed:
+                break
+            for item in placed:
+                self.add(item)
+                upserted[item.id] = item
+            pending = [item for item in pending if item.id not in upserted]
+
+        # Whatever is left was moved out of the tree, or was never in it
+        for item in pending:
+            removed.extend(self._remove(item.id))
+
+        async with self.pool.acquire() as connection, connection.transaction():
+            await self._save(connection, upserted.values(), removed, page_token)
+        self.page_token = page_token
+        return len(upserted) + len(removed)
+
+    @staticmethod
+    async def _save(
+        connection,
+        items: Iterable[DriveItem],
+        removed: list[str],
+        page_token: str,
+    ) -> None:
+        await connection.executemany(
+            """
+            INSERT INTO drive_item (id, name, parents, mime_type, web_view_link, md5)
+            VALUES ($1, $2, $3, $4, $5, $6)
+            ON CONFLICT (id) DO UPDATE SET
+                name = EXCLUDED.name,
+                parents = EXCLUDED.parents,
+                mime_type = EXCLUDED.mime_type,
+                web_view_link = EXCLUDED.web_view_link,
+                md5 = EXCLUDED.md5
+            """,
+            [
+                (i.id, i.name, i.parents, i.mime_type, i.web_view_link, i.md5)
+                for i in items
+            ],
+        )
+        if removed:
+            await connection.execute(
+                "DELETE FROM drive_item WHERE id = ANY($1)", removed
+            )
+        await connection.execute(
+            """
+            INSERT INTO drive_sync (page_token) VALUES ($1)
+            ON CONFLICT (id) DO UPDATE SET page_token = EXCLUDED.page_token
+            """,
+            page_token,
+        )
@@ -0,0 +1,372 @@
+"""Bulk ingestion of past papers into the Drive.
+
+Papers come from zip archives, loose files or a local folder. Each one is
+named consistently (see `normalize_name`), filed under the folder of the
+course code that its name starts with, and skipped if a file with the same
+MD5 is already on the Drive. Existing papers can be renamed the same way.
+Everything is planned against the local `DriveIndex` first, so a dry run costs
+no requests at all; the plan is then carried out with bounded concurrency.
+
+The same pipeline runs from the command line:
+
+    cd src && python -m drive.ingest <zip or folder> [--dry-run] [--rename-existing]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import io
+import pathlib
+import posixpath
+import re
+import zipfile
+from dataclasses import dataclass, field
+from typing import IO, AsyncIterator, Callable
+
+from .client import DriveError, GoogleDrive
+from .folders import FolderResolver
+from .index import DriveIndex, DriveItem
+from .upload import upload_stream
+
+PAPER_EXTENSIONS = {".pdf", ".jpg", ".jpeg", ".png", ".doc", ".docx"}
+READ_SIZE = 1024 * 1024
+INGEST_CONCURRENCY = 4
+
+_MONTH = re.compile(
+    r"\b(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|"
+    r"aug(?:ust)?|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\b\.?,?",
+    re.IGNORECASE,
+)
+_COURSE_CODE = re.compile(r"^([A-Za-z]{2,4})([ -]?)(\d{3}[A-Za-z]?)\b")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_name(name: str) -> str:
+    """Return the name a paper should have on the Drive.
+
+    Month names are dropped (only the year matters for finding a paper),
+    underscores and runs of whitespace become single spaces, and the leading
+    course code and the extension are cased consistently, so that
+    `cs-201_endsem_May 2022.PDF` becomes `CS-201 endsem 2022.pdf`.
+    """
+    stem, dot, extension = name.rpartition(".")
+    if not dot:
+        stem, extension = name, ""
+
+    stem = _MONTH.sub(" ", stem.replace("_", " "))
+    stem = _SPACES.sub(" ", stem).strip(" -,")
+    stem = _COURSE_CODE.sub(
+        lambda match: f"{match[1].upper()}{match[2]}{match[3].upper()}", stem
+    )
+    return f"{stem}.{extension.lower()}" if extension else stem
+
+
+def course_code(name: str) -> str | None:
+    if match := _COURSE_CODE.match(name):
+        return match[0]
+    return None
+
+
+@dataclass
+class Paper:
+    path: str
+    size: int
+    md5: str
+    open: Callable[[], IO[bytes]]
+
+    @property
+    def name(self) -> str:
+        return normalize_name(posixpath.basename(self.path))
+
+    @property
+    def folder(self) -> str | None:
+        """The folder the paper was in, which it is filed under on the Drive"""
+        folder = posixpath.basename(posixpath.dirname(self.path))
+        return folder or None
+
+
+def _md5(open: Callable[[], IO[bytes]]) -> str:
+    digest = hashlib.md5()
+    with open() as file:
+        while data := file.read(READ_SIZE):
+            digest.update(data)
+    return digest.hexdigest()
+
+
+def _is_paper(path: str) -> bool:
+    name = posixpath.basename(path)
+    return (
+        not name.startswith(".")
+        and "__MACOSX" not in path
+        and posixpath.splitext(name)[1].lower() in PAPER_EXTENSIONS
+    )
+
+
+def read_zip(file: IO[bytes]) -> list[Paper]:
+    """Return the papers in a zip archive. This blocks, so run it in a thread."""
+    archive = zipfile.ZipFile(file)
+    papers = []
+    for info in archive.infolist():
+        if info.is_dir() or not _is_paper(info.filename):
+            continue
+
+        def open(info: zipfile.ZipInfo = info) -> IO[bytes]:
+            return archive.open(info)
+
+        papers.append(Paper(info.filename, info.file_size, _md5(open), open))
+    return papers
+
+
+def read_file(name: str, file: IO[bytes]) -> list[Paper]:
+    """Return a single loose paper, which is small enough to keep in memory"""
+    if not _is_paper(name):
+        return []
+    data = file.read()
+
+    def open() -> IO[bytes]:
+        return io.BytesIO(data)
+
+    return [Paper(name, len(data), hashlib.md5(data).hexdigest(), open)]
+
+
+def read_folder(root: pathlib.Path) -> list[Paper]:
+    """Return the papers in a folder. This blocks, so run it in a thread."""
+    papers = []
+    for path in sorted(root.rglob("*")):
+        relative = path.relative_to(root).as_posix()
+        if not path.is_file() or not _is_paper(relative):
+            continue
+
+        def open(path: pathlib.Path = path) -> IO[bytes]:
+            return path.open("rb")
+
+        papers.append(Paper(relative, path.stat().st_size, _md5(open), open))
+    return papers
+
+
+async def read_paper(paper: Paper) -> AsyncIterator[bytes]:
+    file = await asyncio.to_thread(paper.open)
+    try:
+        while data := await asyncio.to_thread(file.read, READ_SIZE):
+            yield data
+    finally:
+        file.close()
+
+
+@dataclass
+class Upload:
+    paper: Paper
+    course: str
+
+    @property
+    def destination(self) -> str:
+        return posixpath.join(self.course, self.paper.folder or "", self.paper.name)
+
+
+@dataclass
+class Rename:
+    item: DriveItem
+    name: str
+
+
+@dataclass
+class IngestPlan:
+    uploads: list[Upload] = field(default_factory=list)
+    renames: list[Rename] = field(default_factory=list)
+    new_folders: list[str] = field(default_factory=list)
+    skipped: list[tuple[str, str]] = field(default_factory=list)
+
+    def report(self) -> str:
+        lines = [f"Uploads ({len(self.uploads)})"]
+        lines += [f"  {u.paper.path} -> {u.destination}" for u in self.uploads]
+        lines += ["", f"New folders ({len(self.new_folders)})"]
+        lines += [f"  {folder}" for folder in self.new_folders]
+        lines += ["", f"Renames ({len(self.renames)})"]
+        lines += [f"  {r.item.name} -> {r.name}" for r in self.renames]
+        lines += ["", f"Skipped ({len(self.skipped)})"]
+        lines += [f"  {path}: {reason}" for path, reason in self.skipped]
+        return "\n".join(lines)
+
+
+def _course_folder(index: DriveIndex, code: str) -> DriveItem | None:
+    for child_id in index.children.get(GoogleDrive.past_papers, ()):
+        child = index.items[child_id]
+        if child.is_folder and code.casefold() in child.name.casefold():
+            return child
+    return None
+
+
+def plan(
+    index: DriveIndex, papers: list[Paper], *, rename_existing: bool = False
+) -> IngestPlan:
+    """Work out what ingesting the papers would do, without doing any of it"""
+    result = IngestPlan()
+    existing = {
+        item.md5: item for item in index.walk(GoogleDrive.past_papers) if item.md5
+    }
+    planned: dict[str, Paper] = {}
+    new_folders: dict[str, None] = {}
+    for paper in papers:
+        if (item := existing.get(paper.md5)) is not None:
+            result.skipped.append((paper.path, f"same content as {item.name}"))
+        elif (other := planned.get(paper.md5)) is not None:
+            result.skipped.append((paper.path, f"same content as {other.path}"))
+        elif (code := course_code(paper.name)) is None:
+            reason = "name does not start with a course code"
+            result.skipped.append((paper.path, reason))
+        else:
+            planned[paper.md5] = paper
+            upload = Upload(paper, code)
+            result.uploads.append(upload)
+
+            course = _course_folder(index, code)
+            if course is None:
+                new_folders[code] = None
+            folder = paper.folder
+            if folder and (
+                course is None
+                or index.find_child(course.id, folder, folder=True) is None
+            ):
+                new_folders[posixpath.join(code, folder)] = None
+    result.new_folders = list(new_folders)
+
+    if rename_existing:
+        folders = [GoogleDrive.past_papers] + [
+            item.id for item in index.walk(GoogleDrive.past_papers) if item.is_folder
+        ]
+        for folder_id in folders:
+            files = [
+                index.items[id]
+                for id in index.children.get(folder_id, ())
+                if not index.items[id].is_folder
+            ]
+            taken = {file.name for file in files}
+            for file in files:
+                name = normalize_name(file.name)
+                # Never rename two papers in the same folder to the same name
+                if name == file.name or name in taken:
+                    continue
+                taken.add(name)
+                result.renames.append(Rename(file, name))
+    return result
+
+
+@dataclass
+class IngestResult:
+    uploaded: list[DriveItem] = field(default_factory=list)
+    renamed: list[DriveItem] = field(default_factory=list)
+    failed: list[tuple[str, str]] = field(default_factory=list)
+
+
+async def execute(
+    plan: IngestPlan,
+    drive: GoogleDrive,
+    index: DriveIndex,
+    resolver: FolderResolver,
+    *,
+    concurrency: int = INGEST_CONCURRENCY,
+) -> IngestResult:
+    """Carry out a plan, uploading and renaming several papers at a time"""
+    result = IngestResult()
+
+    # Folders are resolved up front, one at a time, so that two uploads for the
+    # same new course can never create its folder twice
+    past_papers = index.items[GoogleDrive.past_papers]
+    targets: dict[tuple[str, str | None], DriveItem] = {}
+    for upload in plan.uploads:
+        key = (upload.course, upload.paper.folder)
+        if key in targets:
+            continue
+        course = await resolver.find(past_papers.id, upload.course)
+        if course is None:
+            course = await resolver.create(past_papers.id, upload.course)
+        path = [upload.paper.folder] if upload.paper.folder else []
+        targets[key] = ([course] + (await resolver.resolve(course, path) or []))[-1]
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_upload(upload: Upload) -> None:
+        target = targets[upload.course, upload.paper.folder]
+        async with semaphore:
+            try:
+                file = await upload_stream(
+                    drive,
+                    read_paper(upload.paper),
+                    name=upload.paper.name,
+                    parent_id=target.id,
+                    size=upload.paper.size,
+                )
+            except (DriveError, OSError, zipfile.BadZipFile) as error:
+                result.failed.append((upload.paper.path, str(error)))
+                return
+        item = DriveItem.from_api(file)
+        index.add(item)
+        result.uploaded.append(item)
+
+    async def run_rename(rename: Rename) -> None:
+        async with semaphore:
+            try:
+                file = await drive.rename(rename.item.id, rename.name)
+            except DriveError as error:
+                result.failed.append((rename.item.name, str(error)))
+                return
+        item = DriveItem.from_api(file)
+        index.add(item)
+        result.renamed.append(item)
+
+    await asyncio.gather(
+        *(run_upload(upload) for upload in plan.uploads),
+        *(run_rename(rename) for rename in plan.renames),
+    )
+    return result
+
+
+async def main(argv: list[str] | None = None) -> int:
+    import aiohttp
+
+    import config
+    import database
+
+    parser = argparse.ArgumentParser(description="Bulk upload past papers")
+    parser.add_argument("source", type=pathlib.Path, help="a zip archive or folder")
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--rename-existing", action="store_true")
+    parser.add_argument("--concurrency", type=int, default=INGEST_CONCURRENCY)
+    args = parser.parse_args(argv)
+
+    async with contextlib.AsyncExitStack() as stack:
+        if args.source.is_dir():
+            papers = await asyncio.to_thread(read_folder, args.source)
+        else:
+            # Papers are read from the archive again as they are uploaded, so
+            # it stays open until the plan has been carried out
+            file = stack.enter_context(args.source.open("rb"))
+            papers = await asyncio.to_thread(read_zip, file)
+
+        session = await stack.enter_async_context(aiohttp.ClientSession())
+        pool = await stack.enter_async_context(database.create_pool(config.DB().DSN))
+        drive = GoogleDrive(session)
+        index = DriveIndex(pool, drive, (drive.root, drive.past_papers))
+        await index.load()
+
+        ingest_plan = plan(index, papers, rename_existing=args.rename_existing)
+        print(ingest_plan.report())
+        if args.dry_run:
+            return 0
+
+        resolver = FolderResolver(drive, index)
+        result = await execute(
+            ingest_plan, drive, index, resolver, concurrency=args.concurrency
+        )
+
+    print(f"\nUploaded {len(result.uploaded)}, renamed {len(result.renamed)}")
+    for path, error in result.failed:
+        print(f"Failed: {path}: {error}")
+    return 1 if result.failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(asyncio.run(main()))
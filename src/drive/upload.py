@@ -0,0 +1,109 @@
+"""Stream files into Drive resumable upload sessions.
+
+Attachments are read from the Discord CDN and forwarded to Drive a chunk at a
+time, so an upload never touches the disk and holds at most one chunk in
+memory. A chunk that fails is retried from whatever Drive reports as
+committed, which is why the current chunk is kept until Drive confirms it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import mimetypes
+from typing import Any, AsyncIterator, Callable
+
+import aiohttp
+import discord
+
+from .client import DriveError, GoogleDrive
+
+# Drive requires every chunk but the last to be a multiple of 256 KiB
+CHUNK_SIZE = 32 * 256 * 1024
+MAX_ATTEMPTS = 4
+# How many files a single command uploads at once
+UPLOAD_CONCURRENCY = 3
+
+ProgressCallback = Callable[[int], None]
+
+
+async def read_attachment(
+    session: aiohttp.ClientSession, attachment: discord.Attachment
+) -> AsyncIterator[bytes]:
+    async with session.get(attachment.url) as resp:
+        resp.raise_for_status()
+        async for data in resp.content.iter_chunked(64 * 1024):
+            yield data
+
+
+async def _send(
+    drive: GoogleDrive, session_url: str, chunk: bytes, offset: int, size: int
+) -> dict[str, Any] | None:
+    """Send a chunk until Drive has committed all of it"""
+    end = offset + len(chunk)
+    attempt = 0
+    while True:
+        try:
+            committed, item = await drive.upload_chunk(
+                session_url, chunk, offset, size
+            )
+        except DriveError as error:
+            attempt += 1
+            # Client errors mean the session itself is unusable
+            if attempt >= MAX_ATTEMPTS or (error.status or 500) < 500:
+                raise
+            await asyncio.sleep(2**attempt)
+            committed, item = await drive.upload_status(session_url, size)
+
+        if item is not None or committed >= end:
+            return item
+        if committed < offset:
+            # The bytes Drive lost were in an earlier chunk, which is gone
+            raise DriveError(
+                "upload", None, f"Drive lost bytes {committed}-{offset - 1}"
+            )
+        # Drive kept only part of the chunk; send the rest again
+        chunk, offset = chunk[committed - offset :], committed
+
+
+async def upload_stream(
+    drive: GoogleDrive,
+    data: AsyncIterator[bytes],
+    *,
+    name: str,
+    parent_id: str,
+    size: int,
+    progress: ProgressCallback | None = None,
+) -> dict[str, Any]:
+    """Upload `size` bytes from `data` as a new file and return it"""
+    mime_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+    session_url = await drive.start_upload(name, parent_id, mime_type, size)
+
+    buffer = bytearray()
+    offset = 0
+    async for piece in data:
+        buffer += piece
+        while len(buffer) >= CHUNK_SIZE and offset + CHUNK_SIZE < size:
+            await _send(drive, session_url, bytes(buffer[:CHUNK_SIZE]), offset, size)
+            del buffer[:CHUNK_SIZE]
+            offset += CHUNK_SIZE
+            if progress is not None:
+                progress(offset)
+
+    if (read := offset + len(buffer)) != size:
+        raise DriveError("upload", None, f"expected {size} bytes, read {read}")
+    item = await _send(drive, session_url, bytes(buffer), offset, size)
+    if item is None:
+        raise DriveError("upload", None, "Drive did not return the uploaded file")
+    if progress is not None:
+        progress(size)
+    return item
+
+
+def render_progress(progress: dict[str, tuple[int, int]]) -> str:
+    """Render a progress bar per file from `name: (bytes sent, size)`"""
+    lines = []
+    for name, (sent, size) in progress.items():
+        fraction = sent / size if size else 1.0
+        bar = "▰" * round(10 * fraction) + "▱" * (10 - round(10 * fraction))
+        lines.append(f"`{bar}` {fraction:4.0%} {name}")
+    return "\n".join(lines)
@@ -2,20 +2,24 @@ import asyncio
 import logging
 import pathlib
 import os
-from typing import Any, Type
+from typing import Any, Callable, Coroutine, Type
 from aiohttp import ClientSession, web
 
-import asyncpg
 import config
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from fluent.runtime import FluentLocalization, FluentResourceLoader
 
 import cogs
+import database
 from api.main import app
 from base.context import HyperlinkContext
+from base.tree import HyperlinkTree
 from cogs.verification.ui import VerificationView
-from utils.logger import ErrorHandler, InfoHandler
+from database import queries
+from utils import metrics, tracing
+from utils.looplag import LoopLagMonitor
+from utils.logger import DebugFileHandler, ErrorHandler, InfoHandler, setup_logging
 
 
 class ProjectHyperlink(commands.Bot):
@@ -24,7 +28,7 @@ class ProjectHyperlink(commands.Bot):
     def __init__(
         self,
         *args,
-        db_pool: asyncpg.Pool,
+        db_pool: database.InstrumentedPool,
         logger: logging.Logger,
         web_client: ClientSession,
         **kwargs,
@@ -45,6 +49,7 @@ class ProjectHyperlink(commands.Bot):
             command_prefix=self._prefix_callable,
             intents=intents,
             owner_ids=config.OWNER_IDS,
+            tree_cls=HyperlinkTree,
         )
         self._l10n_path = "l10n/{locale}"
         self._l10n: dict[str, FluentLocalization] = {}
@@ -52,8 +57,10 @@ class ProjectHyperlink(commands.Bot):
         self._guild_locales = {0: "en-GB"}
 
         self.pool = db_pool
+        self.guild_loader = database.Loader(db_pool, queries.GUILDS, "id")
         self.launch_time = discord.utils.utcnow()
         self.logger = logger
+        self.loop_monitor = LoopLagMonitor(logger)
         self.session = web_client
 
     @staticmethod
@@ -71,10 +78,7 @@ class ProjectHyperlink(commands.Bot):
         if message.guild is None:
             return prefixes
 
-        saved_prefixes = await bot.pool.fetch(
-            "SELECT prefix FROM bot_prefix WHERE guild_id = $1",
-            message.guild.id,
-        )
+        saved_prefixes = await bot.pool.run(queries.PREFIXES, message.guild.id)
         if saved_prefixes:
             prefixes = [prefix["prefix"] for prefix in saved_prefixes]
 
@@ -89,14 +93,44 @@ class ProjectHyperlink(commands.Bot):
     ) -> Any:
         return await super().get_context(origin, cls=cls or HyperlinkContext)
 
+    async def invoke(self, ctx: commands.Context) -> None:
+        if ctx.command is None:
+            return await super().invoke(ctx)
+
+        name = ctx.command.qualified_name
+        with tracing.start(name) as trace:
+            if isinstance(ctx, HyperlinkContext):
+                ctx.trace = trace
+            try:
+                await super().invoke(ctx)
+            finally:
+                metrics.COMMAND_LATENCY.labels(
+                    name, "failed" if ctx.command_failed else "ok"
+                ).observe(trace.duration)
+
+        tracing.report_if_slow(trace, ctx.author)
+
+    async def _run_event(
+        self,
+        coro: Callable[..., Coroutine[Any, Any, Any]],
+        event_name: str,
+        *args: Any,
+        **kwargs: Any,
+    ) -> None:
+        listener = getattr(coro, "__qualname__", event_name)
+        with tracing.start(listener) as trace:
+            try:
+                await super()._run_event(coro, event_name, *args, **kwargs)
+            finally:
+                metrics.LISTENER_LATENCY.labels(event_name, listener).observe(
+                    trace.duration
+                )
+
     async def get_l10n(self, guild_id: int = 0) -> FluentLocalization:
+        metrics.cache_lookup("guild_locale", guild_id in self._guild_locales)
         if self._guild_locales.get(guild_id) is None:
-            self._guild_locales[guild_id] = (
-                await self.pool.fetchval(
-                    "SELECT locale FROM guild WHERE id = $1", guild_id
-                )
-                or "en-GB"
-            )
+            rows = await self.guild_loader.load(guild_id)
+            self._guild_locales[guild_id] = (rows and rows[0]["locale"]) or "en-GB"
         locale = self._guild_locales[guild_id]
 
         if self._l10n.get(locale) is None:
@@ -110,9 +144,20 @@ class ProjectHyperlink(commands.Bot):
         assert self.user is not None
         self.logger.info(f"Logged in as {self.user} (ID: {self.user.id})")
 
+    @tasks.loop(seconds=15)
+    async def sample_gateway_metrics(self):
+        """Copy gateway state into its gauges.
+
+        `/metrics` is rendered off the loop, where discord.py's caches can't be
+        read safely, so they are sampled here instead.
+        """
+        metrics.GATEWAY_LATENCY.set(self.latency)
+        metrics.GUILDS.set(len(self.guilds))
+        metrics.MEMBERS.set(sum(guild.member_count or 0 for guild in self.guilds))
+
     async def setup_hook(self) -> None:
-        if config.TESTING_MODE is False:
-            self.logger.addHandler(ErrorHandler(self.loop, self.session))
+        self.loop_monitor.start()
+        self.sample_gateway_metrics.start()
 
         results = await asyncio.gather(
             *(self.load_extension(ext) for ext in cogs.INITIAL_EXTENSIONS),
@@ -141,31 +186,57 @@ class ProjectHyperlink(commands.Bot):
         await site.start()
         self.logger.info(f"API running at localhost:{port}")
 
+    async def close(self) -> None:
+        self.loop_monitor.stop()
+        self.sample_gateway_metrics.cancel()
+        await super().close()
+
 
 async def main():
     logger = logging.getLogger("ProjectHyperlink")
     logger.setLevel(logging.DEBUG)
-    logger.addHandler(InfoHandler())
 
     discord.utils.setup_logging(level=logging.INFO, root=False)
 
-    pool = asyncpg.create_pool(
-        dsn=config.DB().DSN, command_timeout=60, max_inactive_connection_lifetime=0
+    dsn = config.DB().DSN
+    pool = database.create_pool(
+        dsn=dsn, command_timeout=60, max_inactive_connection_lifetime=0
     )
-    session = ClientSession()
+    # Shared by our session and discord.py's, so Discord API calls are timed too
+    http_trace = tracing.instrument_http(metrics.http_trace_config())
+    session = ClientSession(trace_configs=[http_trace])
+
+    handlers: list[logging.Handler] = [InfoHandler(), DebugFileHandler()]
+    if config.TESTING_MODE is False:
+        error_handler = ErrorHandler(asyncio.get_running_loop(), session)
+        handlers.append(error_handler)
+        metrics.QUEUE_DEPTH.labels("log_webhook").set_function(
+            error_handler.log_queue.qsize
+        )
+    log_listener = setup_logging(logger, *handlers)
+    log_listener.start()
+    metrics.QUEUE_DEPTH.labels("log").set_function(log_listener.queue.qsize)
+
+    # The pool prepares statements on connect, so the schema has to exist first
+    await database.migrate(dsn)
+
     bot = ProjectHyperlink(
         db_pool=pool,
         logger=logger,
         web_client=session,
+        http_trace=http_trace,
     )
 
-    async with session, pool, bot:
-        if config.TESTING_MODE is True:
-            assert config.TESTING_BOT_TOKEN is not None
-            await bot.start(config.TESTING_BOT_TOKEN)
-        else:
-            assert config.BOT_TOKEN is not None
-            await bot.start(config.BOT_TOKEN)
+    try:
+        async with session, pool, bot:
+            if config.TESTING_MODE is True:
+                assert config.TESTING_BOT_TOKEN is not None
+                await bot.start(config.TESTING_BOT_TOKEN)
+            else:
+                assert config.BOT_TOKEN is not None
+                await bot.start(config.BOT_TOKEN)
+    finally:
+        log_listener.stop()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,112 @@
+"""Benchmark `utils.search.NameIndex` on a synthetic Drive corpus.
+
+    cd src && python -m utils.bench_search [--files 50000]
+
+Names are generated to look like the notes and past papers on the Drive, e.g.
+`CS-201 Data Structures Endsem May 2022.pdf`.
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from utils.search import NameIndex, tokenize
+
+SUBJECTS = {
+    "CS": ["Data Structures and Algorithms", "Algorithms", "Operating Systems", "Compiler Design"],
+    "EC": ["Signals and Systems", "Digital Electronics", "Analog Circuits"],
+    "EE": ["Power Systems", "Control Systems", "Electrical Machines"],
+    "ME": ["Thermodynamics", "Fluid Mechanics", "Machine Design"],
+    "MA": ["Mathematics", "Probability and Statistics", "Linear Algebra"],
+    "HS": ["Economics", "Communication Skills", "Management"],
+}
+KINDS = ["Midsem", "Endsem", "Quiz", "Notes", "Assignment", "Tutorial", "Lab Manual"]
+MONTHS = ["Jan", "Mar", "May", "Jul", "Oct", "Dec"]
+EXTENSIONS = [".pdf", ".pdf", ".pdf", ".docx", ".pptx", ".jpg"]
+
+QUERIES = [
+    "DSA endsem 2022",
+    "CS-201 midsem",
+    "cs201",
+    "operating systms",
+    "thermodynamcs quiz",
+    "signals 2019",
+    "probability",
+    "compiler design notes",
+    "ma 101 endsem may",
+    "algoritm",
+]
+
+
+def generate(count: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    names = []
+    for _ in range(count):
+        department = rng.choice(list(SUBJECTS))
+        code = f"{department}-{rng.randint(1, 4)}{rng.randint(0, 9)}{rng.randint(1, 9)}"
+        parts = [code, rng.choice(SUBJECTS[department]), rng.choice(KINDS)]
+        if rng.random() < 0.7:
+            parts.append(f"{rng.choice(MONTHS)} {rng.randint(2012, 2023)}")
+        names.append(" ".join(parts) + rng.choice(EXTENSIONS))
+    return names
+
+
+def substring_search(names: list[str], query: str) -> list[int]:
+    """What `drive search` used to do: OR together `name contains` checks"""
+    keywords = [keyword.casefold() for keyword in query.split() if len(keyword) > 2]
+    return [
+        i
+        for i, name in enumerate(names)
+        if any(keyword in name.casefold() for keyword in keywords)
+    ]
+
+
+def percentile(samples: list[float], fraction: float) -> float:
+    return sorted(samples)[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=50_000)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    names = generate(args.files)
+
+    start = time.perf_counter()
+    index: NameIndex[int] = NameIndex()
+    for i, name in enumerate(names):
+        index.add(i, name)
+    build = time.perf_counter() - start
+    vocabulary = len({token for name in names for token in tokenize(name)})
+    print(f"Indexed {len(index)} names ({vocabulary} tokens) in {build:.2f}s\n")
+
+    all_timings = []
+    print(f"{'query':<26}{'p50':>9}{'p99':>9}{'scan':>9}{'scan hits':>11}  top hit")
+    for query in QUERIES:
+        timings = []
+        for _ in range(args.rounds):
+            start = time.perf_counter()
+            results = index.search(query, limit=25)
+            timings.append(time.perf_counter() - start)
+        all_timings.extend(timings)
+
+        start = time.perf_counter()
+        scanned = substring_search(names, query)
+        scan = time.perf_counter() - start
+
+        top = names[results[0][0]] if results else "-"
+        print(
+            f"{query:<26}"
+            f"{percentile(timings, 0.5) * 1000:>7.2f}ms"
+            f"{percentile(timings, 0.99) * 1000:>7.2f}ms"
+            f"{scan * 1000:>7.2f}ms"
+            f"{len(scanned):>11}  {top}"
+        )
+
+    print(f"\nMean over all queries: {statistics.mean(all_timings) * 1000:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Heap snapshots for tracking down memory growth in a running bot.
+
+Both `tracemalloc.take_snapshot` and walking `gc.get_objects` are slow on a
+large heap, so the functions here are meant to be run with `asyncio.to_thread`.
+"""
+
+from __future__ import annotations
+
+import gc
+import tracemalloc
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from discord.utils import utcnow
+
+_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+@dataclass
+class HeapSnapshot:
+    name: str
+    snapshot: tracemalloc.Snapshot
+    object_counts: Counter[str]
+    taken_at: datetime = field(default_factory=utcnow)
+
+    @property
+    def traced_size(self) -> int:
+        return sum(stat.size for stat in self.snapshot.statistics("filename"))
+
+
+def take(name: str) -> HeapSnapshot:
+    """Take a snapshot of traced allocations and live objects by type"""
+    snapshot = tracemalloc.take_snapshot().filter_traces(_FILTERS)
+    object_counts = Counter(type(obj).__qualname__ for obj in gc.get_objects())
+    return HeapSnapshot(name, snapshot, object_counts)
+
+
+def _size(size: int) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}" if unit != "B" else f"{size} B"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+
+def diff(old: HeapSnapshot, new: HeapSnapshot, *, limit: int = 25) -> str:
+    """Return a report of the biggest changes between two snapshots"""
+    stats = new.snapshot.compare_to(old.snapshot, "traceback")
+    lines = [
+        f"Heap diff: `{old.name}` ({old.taken_at:%Y-%m-%d %H:%M:%S}) -> "
+        f"`{new.name}` ({new.taken_at:%Y-%m-%d %H:%M:%S})",
+        f"Traced: {_size(old.traced_size)} -> {_size(new.traced_size)}",
+        "",
+        f"Top {limit} allocation sites by size change",
+    ]
+    for stat in stats[:limit]:
+        lines.append(
+            f"{_size(stat.size_diff):>12} {stat.count_diff:>+9} blocks"
+            f"  (now {_size(stat.size)} in {stat.count} blocks)"
+        )
+        for frame in stat.traceback.format(limit=4, most_recent_first=True):
+            lines.append(f"    {frame}")
+
+    counts = new.object_counts.copy()
+    counts.subtract(old.object_counts)
+    lines.extend(["", f"Top {limit} object types by count growth"])
+    for type_name, change in counts.most_common(limit):
+        lines.append(
+            f"{change:>+10}  {type_name} (now {new.object_counts[type_name]})"
+        )
+
+    return "\n".join(lines)
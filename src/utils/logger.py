@@ -1,22 +1,69 @@
 import io
 import aiohttp
 import asyncio
+import copy
+import json
 import logging
+import logging.handlers
+import os
+import queue
 import traceback
 
 import config
 import discord
 from discord.ext import tasks
 
-# TODO: Add handler for debug which posts into a file.
-# Ref: https://github.com/Rapptz/discord.py/blob/master/examples/advanced_startup.py#L67-L72
+
+class HyperlinkQueueHandler(logging.handlers.QueueHandler):
+    """Hand records over to a `QueueListener` without doing any work inline.
+
+    The stock `QueueHandler.prepare` formats the record (traceback included)
+    on the calling thread, which is exactly the work we want off the event loop.
+    Here only the message is merged with its arguments so that mutable args
+    cannot change before the listener gets to them. `exc_info` and any extras
+    (`fields`, `user`) are passed through untouched.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class JSONFormatter(logging.Formatter):
+    """Format records as one JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S%z"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+
+        fields: dict[str, str] | None = record.__dict__.get("fields")
+        if fields:
+            payload["fields"] = fields
+
+        user: discord.Member | discord.User | None = record.__dict__.get("user")
+        if user is not None:
+            payload["user"] = {"id": user.id, "name": str(user)}
+
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+
+        return json.dumps(payload, default=str)
 
 
 class InfoHandler(logging.Handler):
     def __init__(self):
         super().__init__(logging.INFO)
         self.max_level = logging.INFO
-        self.setFormatter(discord.utils._ColourFormatter())
+        if config.LOG_FORMAT == "json":
+            self.setFormatter(JSONFormatter())
+        else:
+            self.setFormatter(discord.utils._ColourFormatter())
 
     def emit(self, record: logging.LogRecord) -> None:
         if record.levelno <= self.max_level or config.TESTING_MODE is True:
@@ -24,6 +71,29 @@ class InfoHandler(logging.Handler):
             print(self.format(record))
 
 
+class DebugFileHandler(logging.handlers.RotatingFileHandler):
+    # Ref: https://github.com/Rapptz/discord.py/blob/master/examples/advanced_startup.py#L67-L72
+    def __init__(self, filename: str = config.LOG_FILE):
+        os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+        super().__init__(
+            filename=filename,
+            encoding="utf-8",
+            maxBytes=32 * 1024 * 1024,  # 32 MiB
+            backupCount=5,
+        )
+        self.setLevel(logging.DEBUG)
+        if config.LOG_FORMAT == "json":
+            self.setFormatter(JSONFormatter())
+        else:
+            self.setFormatter(
+                logging.Formatter(
+                    "[{asctime}] [{levelname:<8}] {name}: {message}",
+                    "%Y-%m-%d %H:%M:%S",
+                    style="{",
+                )
+            )
+
+
 class ErrorHandler(logging.Handler):
     def __init__(self, loop: asyncio.AbstractEventLoop, session: aiohttp.ClientSession):
         super().__init__(logging.WARNING)
@@ -47,6 +117,7 @@ class ErrorHandler(logging.Handler):
         self.cc = f"cc {', '.join(mentions)}"
 
     def emit(self, record):
+        # Runs on the `QueueListener` thread; only the hand-off touches the loop
         try:
             embed = discord.Embed(
                 title=record.levelname,
@@ -75,15 +146,17 @@ class ErrorHandler(logging.Handler):
             if user is not None:
                 embed.add_field(name="Invoked by", value=f"{user.mention}: {user.id}")
 
-            self.log_queue.put_nowait(
+            self.loop.call_soon_threadsafe(
+                self.log_queue.put_nowait,
                 (
                     record,
                     embed,
                     files,
-                )
+                ),
             )
-        except:
-            raise
+        except RuntimeError:
+            # The loop has been closed during shutdown
+            pass
 
     @tasks.loop(seconds=0)
     async def digest_log_queue(self):
@@ -95,3 +168,19 @@ class ErrorHandler(logging.Handler):
             silent=record.levelno < logging.CRITICAL,
             username="Hyperlink Status",
         )
+
+
+def setup_logging(
+    logger: logging.Logger, *handlers: logging.Handler
+) -> logging.handlers.QueueListener:
+    """Attach a non-blocking queue handler to `logger`.
+
+    Formatting and output for every given handler happen on the returned
+    listener's thread. The caller is responsible for starting and stopping it.
+    """
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    logger.addHandler(HyperlinkQueueHandler(log_queue))
+
+    return logging.handlers.QueueListener(
+        log_queue, *handlers, respect_handler_level=True
+    )
@@ -0,0 +1,142 @@
+"""Event loop lag monitoring.
+
+A coroutine on the loop sleeps for a fixed interval and records how late it
+wakes up. A watchdog thread keeps an eye on that coroutine's heartbeat: if the
+loop stops ticking for longer than the threshold, the thread grabs the loop
+thread's current stack (the code that is blocking it) and logs it as a warning,
+which ends up with `ErrorHandler`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+import config
+from utils import metrics
+
+LOOP_LAG = metrics.Histogram(
+    "hyperlink_event_loop_lag_seconds",
+    "Delay between when a loop callback was due and when it ran",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+LOOP_LAG_QUANTILE = metrics.Gauge(
+    "hyperlink_event_loop_lag_quantile_seconds",
+    "Event loop lag percentiles over the recent sampling window",
+    ("quantile",),
+)
+LOOP_BLOCKED = metrics.Counter(
+    "hyperlink_event_loop_blocked_total",
+    "Times the event loop was blocked for longer than the threshold",
+)
+
+
+class LoopLagMonitor:
+    def __init__(
+        self,
+        logger: logging.Logger,
+        *,
+        interval: float = 0.25,
+        threshold: float = config.LOOP_LAG_THRESHOLD,
+        window: int = 1200,
+        cooldown: float = 60.0,
+    ):
+        self.logger = logger
+        self.interval = interval
+        self.threshold = threshold
+        self.cooldown = cooldown
+
+        self._lock = threading.Lock()
+        self._samples: deque[float] = deque(maxlen=window)
+        self._heartbeat = time.monotonic()
+        self._last_report = 0.0
+
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread_id: int | None = None
+        self._task: asyncio.Task | None = None
+        self._stopped = threading.Event()
+        self._watchdog = threading.Thread(
+            target=self._watch, name="loop-lag-watchdog", daemon=True
+        )
+
+        for quantile in (0.5, 0.9, 0.99, 1.0):
+            LOOP_LAG_QUANTILE.labels(quantile).set_function(
+                lambda q=quantile: self.percentile(q)
+            )
+
+    def start(self) -> None:
+        """Start sampling; must be called from the loop being monitored"""
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._task = self._loop.create_task(self._sample(), name="loop-lag-sampler")
+        self._watchdog.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+
+    def percentile(self, quantile: float) -> float:
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return 0.0
+        return samples[round(quantile * (len(samples) - 1))]
+
+    async def _sample(self) -> None:
+        assert self._loop is not None
+        while True:
+            expected = self._loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, self._loop.time() - expected)
+
+            LOOP_LAG.observe(lag)
+            with self._lock:
+                self._samples.append(lag)
+            self._heartbeat = time.monotonic()
+
+    def _watch(self) -> None:
+        blocked = False
+        while not self._stopped.wait(self.interval):
+            stalled = time.monotonic() - self._heartbeat - self.interval
+            if stalled < self.threshold:
+                blocked = False
+                continue
+            if blocked:
+                # Already reported this stall
+                continue
+
+            blocked = True
+            LOOP_BLOCKED.inc()
+            if time.monotonic() - self._last_report < self.cooldown:
+                continue
+            self._last_report = time.monotonic()
+            self._report(stalled)
+
+    def _report(self, stalled: float) -> None:
+        assert self._loop_thread_id is not None
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return
+        stack = "".join(traceback.format_stack(frame))
+
+        fields = {}
+        try:
+            task = asyncio.current_task(self._loop)
+        except RuntimeError:
+            task = None
+        if task is not None:
+            fields["Task"] = f"`{task.get_name()}`: `{task.get_coro()!r}`"[:1024]
+        # Keep the innermost frames, they are the ones doing the blocking
+        fields["Stack"] = f"```{stack[-1000:]}```"
+
+        self.logger.warning(
+            f"Event loop blocked for over {stalled * 1000:.0f}ms",
+            extra={"fields": fields},
+        )
@@ -0,0 +1,366 @@
+"""A minimal, dependency-free metrics registry.
+
+Metrics are rendered in the Prometheus text exposition format (version 0.0.4).
+Every update takes a short `threading.Lock` so that rendering can happen on a
+worker thread while the event loop keeps recording.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+import threading
+import time
+from typing import Callable, Iterable
+
+import aiohttp
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> None:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric `{metric.name}` is already registered")
+            self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        """Return all metrics in the text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        *,
+        registry: Registry | None = REGISTRY,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+
+        self._lock = threading.Lock()
+        self._children: dict[tuple[str, ...], object] = {}
+
+        if registry is not None:
+            registry.register(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: object):
+        """Return the child metric for the given label values"""
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"Expected labels {self.labelnames}, got {values}")
+        key = tuple(str(value) for value in values)
+        with self._lock:
+            child = self._children.get(key)
+            if child is None:
+                child = self._children[key] = self._new_child()
+        return child
+
+    def _items(self) -> list[tuple[tuple[str, ...], object]]:
+        with self._lock:
+            return list(self._children.items())
+
+    def collect(self) -> list[str]:
+        raise NotImplementedError
+
+
+class _CounterChild:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def collect(self) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"
+            for key, child in self._items()
+        ]
+
+
+class _GaugeChild:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._value = 0.0
+        self._function: Callable[[], float] | None = None
+
+    def set(self, value: float) -> None:
+        with self._lock:
+            self._value = value
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.inc(-amount)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Compute the value lazily, at render time"""
+        self._function = function
+
+    @property
+    def value(self) -> float:
+        if self._function is not None:
+            try:
+                return float(self._function())
+            except Exception:
+                return math.nan
+        return self._value
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.labels().dec(amount)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        self.labels().set_function(function)
+
+    def collect(self) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"
+            for key, child in self._items()
+        ]
+
+
+class _HistogramChild:
+    def __init__(self, buckets: tuple[float, ...]):
+        self._lock = threading.Lock()
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def time(self) -> "_Timer":
+        return _Timer(self.observe)
+
+    def snapshot(self) -> tuple[list[int], float]:
+        with self._lock:
+            return list(self.counts), self.sum
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        *,
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+        registry: Registry | None = REGISTRY,
+    ):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry=registry)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def time(self) -> "_Timer":
+        return self.labels().time()
+
+    def collect(self) -> list[str]:
+        lines = []
+        for key, child in self._items():
+            counts, total = child.snapshot()
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                labels = _format_labels(
+                    (*self.labelnames, "le"), (*key, _format_value(bound))
+                )
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class _Timer:
+    """Context manager that observes the elapsed time on exit"""
+
+    def __init__(self, observe: Callable[[float], None]):
+        self._observe = observe
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *_):
+        self._observe(time.perf_counter() - self._start)
+
+
+# Bot metrics
+COMMAND_LATENCY = Histogram(
+    "hyperlink_command_duration_seconds",
+    "Time taken to run a prefix command",
+    ("command", "status"),
+)
+APP_COMMAND_LATENCY = Histogram(
+    "hyperlink_app_command_duration_seconds",
+    "Time taken to run an application command",
+    ("command", "status"),
+)
+LISTENER_LATENCY = Histogram(
+    "hyperlink_listener_duration_seconds",
+    "Time taken by an event listener",
+    ("event", "listener"),
+)
+QUERY_LATENCY = Histogram(
+    "hyperlink_db_query_duration_seconds",
+    "Time taken by a PostgreSQL statement",
+    ("statement", "status"),
+)
+HTTP_LATENCY = Histogram(
+    "hyperlink_http_request_duration_seconds",
+    "Time taken by an outgoing HTTP request",
+    ("host", "method", "endpoint", "status"),
+)
+GATEWAY_LATENCY = Gauge(
+    "hyperlink_gateway_latency_seconds",
+    "Latency between a HEARTBEAT and its HEARTBEAT_ACK",
+)
+GUILDS = Gauge("hyperlink_guilds", "Number of guilds the bot is in")
+MEMBERS = Gauge("hyperlink_members", "Number of members across all guilds")
+CACHE_REQUESTS = Counter(
+    "hyperlink_cache_requests_total",
+    "Lookups against an in-memory cache",
+    ("cache", "result"),
+)
+QUERIES_PER_OPERATION = Histogram(
+    "hyperlink_db_queries_per_operation",
+    "Statements issued by a single command or listener run",
+    ("source",),
+    buckets=(0, 1, 2, 3, 5, 10, 25, 50, 100),
+)
+QUEUE_DEPTH = Gauge(
+    "hyperlink_queue_depth",
+    "Number of items waiting in an internal queue",
+    ("queue",),
+)
+
+
+def cache_lookup(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_statement(query: str) -> str:
+    """Collapse a SQL statement onto one short line, for logs and trace spans"""
+    query = _WHITESPACE.sub(" ", query).strip()
+    return query if len(query) <= 120 else query[:117] + "..."
+
+
+_PATH_ID = re.compile(r"/(?:[0-9]+|[A-Za-z]{2,3}-?[0-9]{3,}[A-Za-z]?)(?=/|$)")
+_PATH_TOKEN = re.compile(r"/[\w.-]{32,}(?=/|$)")
+
+
+def normalize_endpoint(path: str) -> str:
+    """Replace IDs, roll numbers, course codes and tokens in a URL path"""
+    return _PATH_TOKEN.sub("/{token}", _PATH_ID.sub("/{id}", path))
+
+
+def http_trace_config() -> aiohttp.TraceConfig:
+    """Return a trace config that times every request made by a session"""
+
+    async def on_request_start(_, context, params: aiohttp.TraceRequestStartParams):
+        context.start = time.perf_counter()
+
+    def observe(context, method: str, url, status: str):
+        endpoint = normalize_endpoint(url.path)
+        HTTP_LATENCY.labels(url.host, method, endpoint, status).observe(
+            time.perf_counter() - context.start
+        )
+
+    async def on_request_end(_, context, params: aiohttp.TraceRequestEndParams):
+        observe(context, params.method, params.url, str(params.response.status))
+
+    async def on_request_exception(
+        _, context, params: aiohttp.TraceRequestExceptionParams
+    ):
+        observe(context, params.method, params.url, "error")
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_request_end.append(on_request_end)
+    trace_config.on_request_exception.append(on_request_exception)
+    return trace_config
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from typing import Any, Awaitable, Callable
+
+import discord
+
+PageRenderer = Callable[[int], Awaitable[dict[str, Any]]]
+
+
+class Paginator(discord.ui.View):
+    """Button-paginated view that renders each page only when it is shown.
+
+    `render` receives a zero-based page index and returns the keyword arguments
+    for `send_message`/`edit_message` (usually `content` or `embed`).
+    """
+
+    def __init__(
+        self,
+        render: PageRenderer,
+        page_count: int,
+        *,
+        author_id: int,
+        timeout: float | None = 180.0,
+    ):
+        super().__init__(timeout=timeout)
+        self.render = render
+        self.page_count = max(page_count, 1)
+        self.author_id = author_id
+        self.page = 0
+        self.message: discord.Message | discord.InteractionMessage | None = None
+
+        self._update_buttons()
+
+    def _update_buttons(self) -> None:
+        self.first.disabled = self.previous.disabled = self.page == 0
+        self.next.disabled = self.last.disabled = self.page >= self.page_count - 1
+        self.indicator.label = f"{self.page + 1}/{self.page_count}"
+
+    async def start(
+        self, interaction: discord.Interaction, *, ephemeral: bool = False
+    ) -> None:
+        """Send the first page as the response to, or a followup of, an interaction"""
+        kwargs = await self.render(0)
+        if self.page_count == 1:
+            self.stop()
+            view = discord.utils.MISSING
+        else:
+            view = self
+
+        if interaction.response.is_done():
+            self.message = await interaction.followup.send(
+                **kwargs, view=view, ephemeral=ephemeral, wait=True
+            )
+        else:
+            await interaction.response.send_message(
+                **kwargs, view=view, ephemeral=ephemeral
+            )
+            self.message = await interaction.original_response()
+
+    async def send(self, messageable: discord.abc.Messageable) -> None:
+        """Send the first page to a channel, for prefix commands"""
+        kwargs = await self.render(0)
+        if self.page_count == 1:
+            self.stop()
+            self.message = await messageable.send(**kwargs)
+        else:
+            self.message = await messageable.send(**kwargs, view=self)
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return interaction.user.id == self.author_id
+
+    async def on_timeout(self) -> None:
+        if self.message is None:
+            return
+        try:
+            await self.message.edit(view=None)
+        except discord.HTTPException:
+            pass
+
+    async def show(self, interaction: discord.Interaction, page: int) -> None:
+        self.page = max(0, min(page, self.page_count - 1))
+        self._update_buttons()
+        kwargs = await self.render(self.page)
+        await interaction.response.edit_message(**kwargs, view=self)
+
+    @discord.ui.button(label="≪", style=discord.ButtonStyle.grey)
+    async def first(self, interaction: discord.Interaction, _: discord.ui.Button):
+        await self.show(interaction, 0)
+
+    @discord.ui.button(label="‹", style=discord.ButtonStyle.blurple)
+    async def previous(self, interaction: discord.Interaction, _: discord.ui.Button):
+        await self.show(interaction, self.page - 1)
+
+    @discord.ui.button(label="1/1", style=discord.ButtonStyle.grey, disabled=True)
+    async def indicator(self, interaction: discord.Interaction, _: discord.ui.Button):
+        pass
+
+    @discord.ui.button(label="›", style=discord.ButtonStyle.blurple)
+    async def next(self, interaction: discord.Interaction, _: discord.ui.Button):
+        await self.show(interaction, self.page + 1)
+
+    @discord.ui.button(label="≫", style=discord.ButtonStyle.grey)
+    async def last(self, interaction: discord.Interaction, _: discord.ui.Button):
+        await self.show(interaction, self.page_count - 1)
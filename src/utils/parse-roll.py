@@ -85,6 +85,8 @@ async def add_to_db(students: list[Student]):
 
     async with pool:
         await pool.execute(insert_str)
+        # Let the bot refresh its `/memlist` stats
+        await pool.execute(f"NOTIFY student_import, '{BATCH}'")
 
 
 students = parse_roll()
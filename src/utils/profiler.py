@@ -0,0 +1,125 @@
+"""A sampling CPU profiler that runs alongside the bot.
+
+Stacks are sampled from a worker thread through `sys._current_frames`, so
+nothing is installed on the profiled code and the event loop keeps running
+while a profile is taken. Samples taken while a thread is idle, waiting in
+`select` for the next event or on a lock, are dropped and only counted, so a
+profile shows where time was spent working rather than waiting.
+"""
+
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from collections import Counter
+from types import FrameType
+
+# Functions a thread waits in when it has nothing to do, by file and name
+IDLE_FRAMES = {
+    ("selectors.py", "SelectSelector.select"),
+    ("selectors.py", "_PollLikeSelector.select"),
+    ("selectors.py", "EpollSelector.select"),
+    ("selectors.py", "DevpollSelector.select"),
+    ("selectors.py", "KqueueSelector.select"),
+    ("threading.py", "Condition.wait"),
+    ("threading.py", "Thread._wait_for_tstate_lock"),
+    ("queue.py", "Queue.get"),
+}
+
+
+def _describe(frame: FrameType) -> str:
+    code = frame.f_code
+    filename = code.co_filename.rsplit("/", 2)
+    return f"{code.co_qualname} ({'/'.join(filename[-2:])}:{code.co_firstlineno})"
+
+
+def _is_idle(frame: FrameType) -> bool:
+    code = frame.f_code
+    return (code.co_filename.rsplit("/", 1)[-1], code.co_qualname) in IDLE_FRAMES
+
+
+class Profile:
+    def __init__(
+        self,
+        stacks: Counter[tuple[str, ...]],
+        duration: float,
+        samples: int,
+        idle: int,
+    ):
+        self.stacks = stacks
+        self.duration = duration
+        self.samples = samples
+        # Stacks dropped because their thread was waiting
+        self.idle = idle
+
+    def collapsed(self) -> str:
+        """Return the stacks in the collapsed format used by flamegraph.pl/speedscope"""
+        return "\n".join(
+            f"{';'.join(stack)} {count}" for stack, count in self.stacks.most_common()
+        )
+
+    def top(self, limit: int = 20) -> str:
+        """Return a summary of the functions with the most self and total samples"""
+        own: Counter[str] = Counter()
+        total: Counter[str] = Counter()
+        for stack, count in self.stacks.items():
+            own[stack[-1]] += count
+            for frame in set(stack[1:]):
+                total[frame] += count
+
+        def table(counter: Counter[str]) -> list[str]:
+            return [
+                f"{count:>8} {count / (self.samples or 1):>7.1%}  {frame}"
+                for frame, count in counter.most_common(limit)
+            ]
+
+        return "\n".join(
+            [
+                f"{self.samples} samples over {self.duration:.1f}s, "
+                f"{self.idle} idle stacks dropped",
+                "",
+                f"Top {limit} by self samples",
+                *table(own),
+                "",
+                f"Top {limit} by total samples",
+                *table(total),
+            ]
+        )
+
+
+def sample(
+    seconds: float, thread_id: int | None = None, *, interval: float = 0.005
+) -> Profile:
+    """Sample the stacks of a thread, or of all other threads, for the given duration.
+
+    This blocks the calling thread, so it should be run with `asyncio.to_thread`.
+    Each stack is rooted at the name of the thread it was taken from.
+    """
+    own_id = threading.get_ident()
+    stacks: Counter[tuple[str, ...]] = Counter()
+    samples = idle = 0
+
+    start = time.perf_counter()
+    deadline = start + seconds
+    while time.perf_counter() < deadline:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own_id or thread_id is not None and ident != thread_id:
+                continue
+            if _is_idle(frame):
+                idle += 1
+                continue
+
+            stack = []
+            current: FrameType | None = frame
+            while current is not None:
+                stack.append(_describe(current))
+                current = current.f_back
+            stack.append(names.get(ident, str(ident)))
+
+            stacks[tuple(reversed(stack))] += 1
+        samples += 1
+        time.sleep(interval)
+
+    return Profile(stacks, time.perf_counter() - start, samples, idle)
@@ -0,0 +1,116 @@
+"""Small lookup tables from Breadboard, like hostels, kept fresh in the background.
+
+A table is refreshed with a conditional request, so an unchanged table costs a
+304 and nothing else. A changed table is parsed in full before it replaces the
+old one, in a single assignment, so readers only ever see a whole table. The
+last table fetched is saved to disk along with its validators: a restart
+serves it right away and revalidates it rather than refetching, and a failed
+refresh keeps serving it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Callable, Generic, TypeVar
+
+import aiohttp
+
+import config
+from utils import snapshot
+
+T = TypeVar("T")
+
+logger = logging.getLogger("ProjectHyperlink")
+
+
+class ReferenceTable(Generic[T]):
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        endpoint: str,
+        parse: Callable[[Any], T],
+        snapshot_path: str | os.PathLike,
+    ):
+        self.session = session
+        self.endpoint = endpoint
+        self.parse = parse
+        self.snapshot_path = snapshot_path
+        self.data: T | None = None
+        # Bumped whenever the table changes
+        self.version = 0
+        self.fetched_at: float | None = None
+        self._validators: dict[str, str] = {}
+        self._raw: Any = None
+
+    def _swap(self, raw: Any, validators: dict[str, str]) -> bool:
+        """Replace the table, and return whether its contents changed"""
+        if raw == self._raw:
+            self._validators = validators
+            return False
+        data = self.parse(raw)
+        self.data, self._raw, self._validators = data, raw, validators
+        self.version += 1
+        return True
+
+    async def load_snapshot(self) -> bool:
+        """Serve the last table saved, and return whether there was one"""
+        try:
+            saved = await asyncio.to_thread(snapshot.read, self.snapshot_path)
+            self._swap(saved["data"], saved["validators"])
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError, KeyError, TypeError) as error:
+            logger.warning(
+                f"Ignoring unreadable snapshot of `{self.endpoint}`: {error}"
+            )
+            return False
+        return True
+
+    async def refresh(self) -> bool:
+        """Revalidate the table, and return whether it changed.
+
+        Failures are logged and the table already held is kept.
+        """
+        headers = {}
+        if etag := self._validators.get("ETag"):
+            headers["If-None-Match"] = etag
+        if last_modified := self._validators.get("Last-Modified"):
+            headers["If-Modified-Since"] = last_modified
+
+        try:
+            async with self.session.get(
+                f"{config.API_URL}/{self.endpoint}", headers=headers
+            ) as resp:
+                if resp.status == 304:
+                    self.fetched_at = time.time()
+                    return False
+                resp.raise_for_status()
+                raw = (await resp.json())["data"]
+                validators = {
+                    name: resp.headers[name]
+                    for name in ("ETag", "Last-Modified")
+                    if name in resp.headers
+                }
+            changed = self._swap(raw, validators)
+        except (
+            aiohttp.ClientError,
+            asyncio.TimeoutError,
+            KeyError,
+            TypeError,
+            ValueError,
+        ) as error:
+            logger.warning(f"Refreshing `{self.endpoint}` failed: {error!r}")
+            return False
+
+        self.fetched_at = time.time()
+        if not changed:
+            return False
+        saved = {"validators": validators, "data": raw}
+        try:
+            await asyncio.to_thread(snapshot.write, self.snapshot_path, saved)
+        except OSError as error:
+            logger.warning(f"Saving a snapshot of `{self.endpoint}` failed: {error}")
+        return True
@@ -0,0 +1,192 @@
+"""Ranked, typo tolerant search over short names, like Drive file names.
+
+Names are split into tokens, and every distinct token is indexed by its
+trigrams. A query token matches indexed tokens exactly, by prefix (`endsem`
+finds `endsemester`), or within a small edit distance (`algoritm` finds
+`algorithm`); trigrams narrow the vocabulary down to the few tokens worth
+comparing. Course codes are normalised (`CS-201`, `cs 201` and `CS201` are all
+`cs201`) and, like years and very short tokens, only ever match exactly, but
+weigh more than anything else in a name. Runs of words are also indexed by
+their initials, so that `dsa` finds "Data Structures and Algorithms".
+
+Documents are scored by the IDF of their best match for each query token, with
+names that match every query token and shorter names ranked first.
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+import re
+from collections import Counter
+from typing import Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+
+_COURSE_CODE = re.compile(r"\b([a-z]{2,4})[\s_-]?(\d{3})([a-z]?)\b")
+_TOKEN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset({"and", "of", "the", "for", "in", "to"})
+
+PREFIX_WEIGHT = 0.8
+FUZZY_WEIGHT = 0.6
+COURSE_CODE_WEIGHT = 2.0
+# Fuzzy candidates must share at least this share of trigrams (Dice coefficient)
+MIN_SIMILARITY = 0.4
+
+
+def tokenize(text: str) -> list[str]:
+    text = _COURSE_CODE.sub(r"\1\2\3", text.casefold())
+    return _TOKEN.findall(text)
+
+
+def acronyms(tokens: list[str], longest: int = 4) -> set[str]:
+    """Return the initials of every run of two or more words in a name"""
+    words = [token for token in tokens if token not in _STOPWORDS]
+    found = set()
+    for start in range(len(words)):
+        initials = ""
+        for word in words[start : start + longest]:
+            if not word.isalpha() or len(word) < 3:
+                break
+            initials += word[0]
+            if len(initials) > 1:
+                found.add(initials)
+    return found
+
+
+def trigrams(token: str) -> set[str]:
+    padded = f" {token} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def is_course_code(token: str) -> bool:
+    return _COURSE_CODE.fullmatch(token) is not None
+
+
+def _exact_only(token: str) -> bool:
+    return len(token) < 3 or token.isdigit() or is_course_code(token)
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein distance, or `limit + 1` once it is known to exceed `limit`"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(
+                min(
+                    previous[j] + 1,
+                    current[j - 1] + 1,
+                    previous[j - 1] + (char_a != char_b),
+                )
+            )
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class NameIndex(Generic[K]):
+    """An inverted index from name tokens to document keys"""
+
+    def __init__(self):
+        self._documents: dict[K, list[str]] = {}
+        self._indexed: dict[K, set[str]] = {}
+        self._postings: dict[str, set[K]] = {}
+        self._trigrams: dict[str, set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def __contains__(self, key: K) -> bool:
+        return key in self._documents
+
+    def add(self, key: K, name: str) -> None:
+        if key in self._documents:
+            self.remove(key)
+
+        tokens = tokenize(name)
+        self._documents[key] = tokens
+        self._indexed[key] = set(tokens) | acronyms(tokens)
+        for token in self._indexed[key]:
+            if token not in self._postings:
+                self._postings[token] = set()
+                for gram in trigrams(token):
+                    self._trigrams.setdefault(gram, set()).add(token)
+            self._postings[token].add(key)
+
+    def remove(self, key: K) -> None:
+        self._documents.pop(key, None)
+        for token in self._indexed.pop(key, ()):
+            postings = self._postings[token]
+            postings.discard(key)
+            if postings:
+                continue
+
+            del self._postings[token]
+            for gram in trigrams(token):
+                self._trigrams[gram].discard(token)
+                if not self._trigrams[gram]:
+                    del self._trigrams[gram]
+
+    def _idf(self, token: str) -> float:
+        return math.log(1 + len(self._documents) / len(self._postings[token]))
+
+    def expand(self, token: str) -> list[tuple[str, float]]:
+        """Return the indexed tokens that a query token matches, with weights"""
+        matches = []
+        if token in self._postings:
+            weight = COURSE_CODE_WEIGHT if is_course_code(token) else 1.0
+            matches.append((token, weight))
+        if _exact_only(token):
+            return matches
+
+        grams = trigrams(token)
+        shared: Counter[str] = Counter()
+        for gram in grams:
+            shared.update(self._trigrams.get(gram, ()))
+
+        limit = 1 if len(token) <= 7 else 2
+        for candidate, count in shared.items():
+            if candidate == token or _exact_only(candidate):
+                continue
+            if candidate.startswith(token):
+                matches.append((candidate, PREFIX_WEIGHT))
+                continue
+            similarity = 2 * count / (len(grams) + len(candidate) + 2)
+            if similarity < MIN_SIMILARITY:
+                continue
+            distance = edit_distance(token, candidate, limit)
+            if distance <= limit:
+                weight = FUZZY_WEIGHT * (1 - distance / (len(token) + 1))
+                matches.append((candidate, weight))
+        return matches
+
+    def search(self, query: str, limit: int = 25) -> list[tuple[K, float]]:
+        """Return the `limit` best matching keys with their scores"""
+        query_tokens = list(dict.fromkeys(tokenize(query)))
+        if not query_tokens:
+            return []
+
+        scores: Counter[K] = Counter()
+        matched: Counter[K] = Counter()
+        for query_token in query_tokens:
+            best: dict[K, float] = {}
+            for token, weight in self.expand(query_token):
+                score = weight * self._idf(token)
+                for key in self._postings[token]:
+                    if score > best.get(key, 0.0):
+                        best[key] = score
+            scores.update(best)
+            matched.update(best.keys())
+
+        def rank(key: K) -> float:
+            coverage = matched[key] / len(query_tokens)
+            length_penalty = 1 + 0.02 * len(self._documents[key])
+            return scores[key] * coverage**2 / length_penalty
+
+        top = heapq.nlargest(limit, scores, key=rank)
+        return [(key, rank(key)) for key in top]
@@ -0,0 +1,35 @@
+"""JSON snapshots of reference data, kept on disk for warm restarts.
+
+Paths ending in `.gz` are gzipped. Snapshots are written next to their final
+path and swapped in with `os.replace`, so a crash mid-write never leaves a
+half-written snapshot behind. Both functions block, so run them in a thread.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import pathlib
+from typing import IO, Any
+
+
+def _open(path: pathlib.Path, mode: str, compressed: bool) -> IO[str]:
+    if compressed:
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def read(path: str | os.PathLike) -> Any:
+    path = pathlib.Path(path)
+    with _open(path, "r", path.suffix == ".gz") as file:
+        return json.load(file)
+
+
+def write(path: str | os.PathLike, data: Any) -> None:
+    path = pathlib.Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_name(path.name + ".tmp")
+    with _open(temporary, "w", path.suffix == ".gz") as file:
+        json.dump(data, file, separators=(",", ":"))
+    os.replace(temporary, path)
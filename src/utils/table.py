@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+from typing import Sequence
+
+Row = Sequence[object]
+
+
+def grid(headers: Row, groups: Sequence[Sequence[Row]]) -> str:
+    """Render rows as a plain-text grid, with rules only between groups of rows.
+
+    Numbers are right-aligned and everything else is left-aligned; headers
+    follow the alignment of their column.
+    """
+    rows = [row for group in groups for row in group]
+    widths = [len(str(header)) for header in headers]
+    numeric = [True] * len(headers)
+    for row in rows:
+        for i, value in enumerate(row):
+            widths[i] = max(widths[i], len(str(value)))
+            numeric[i] = numeric[i] and isinstance(value, (int, float))
+
+    def line(values: Row) -> str:
+        cells = [
+            str(value).rjust(width) if is_number else str(value).ljust(width)
+            for value, width, is_number in zip(values, widths, numeric)
+        ]
+        return "| " + " | ".join(cells) + " |"
+
+    rule = "+" + "+".join("-" * (width + 2) for width in widths) + "+"
+    lines = [rule, line(headers), rule]
+    for group in groups:
+        lines.extend(line(row) for row in group)
+        lines.append(rule)
+    return "\n".join(lines)
@@ -0,0 +1,155 @@
+"""Lightweight per-command tracing.
+
+A `Trace` is started for every prefix command and app command and stored in a
+context variable, so anything running inside that command (checks, queries,
+HTTP requests, l10n, sends) can attach spans to it without being passed the
+trace explicitly.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import functools
+import logging
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Iterator, TypeVar
+
+import aiohttp
+import discord
+
+import config
+from utils import metrics
+
+T = TypeVar("T")
+
+_current_trace: ContextVar[Trace | None] = ContextVar("trace", default=None)
+
+
+@dataclass
+class Span:
+    name: str
+    start: float
+    duration: float = 0.0
+
+
+@dataclass
+class Trace:
+    name: str
+    start: float = field(default_factory=time.perf_counter)
+    end: float | None = None
+    spans: list[Span] = field(default_factory=list)
+    queries: int = 0
+
+    @property
+    def duration(self) -> float:
+        return (self.end or time.perf_counter()) - self.start
+
+    @contextlib.contextmanager
+    def span(self, name: str) -> Iterator[Span]:
+        span = Span(name, time.perf_counter())
+        try:
+            yield span
+        finally:
+            span.duration = time.perf_counter() - span.start
+            self.spans.append(span)
+
+    def record(self, name: str, duration: float) -> None:
+        """Add a span that was timed elsewhere and has already ended"""
+        self.spans.append(Span(name, time.perf_counter() - duration, duration))
+
+    def finish(self) -> float:
+        self.end = time.perf_counter()
+        return self.duration
+
+    def breakdown(self, limit: int = 10) -> dict[str, str]:
+        """Return the slowest span names with their call count and total time"""
+        totals: dict[str, tuple[int, float]] = {}
+        for span in self.spans:
+            count, total = totals.get(span.name, (0, 0.0))
+            totals[span.name] = count + 1, total + span.duration
+
+        slowest = sorted(totals.items(), key=lambda item: item[1][1], reverse=True)
+        return {
+            name[:256]: f"`{total * 1000:.1f}ms` over {count} call(s)"
+            for name, (count, total) in slowest[:limit]
+        }
+
+
+def current() -> Trace | None:
+    return _current_trace.get()
+
+
+@contextlib.contextmanager
+def start(name: str) -> Iterator[Trace]:
+    """Start a trace and make it current for the duration of the block"""
+    trace = Trace(name)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        trace.finish()
+        _current_trace.reset(token)
+        metrics.QUERIES_PER_OPERATION.labels(trace.name).observe(trace.queries)
+
+
+@contextlib.contextmanager
+def span(name: str) -> Iterator[Span | None]:
+    """Time a block as a span of the current trace, if there is one"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+    with trace.span(name) as s:
+        yield s
+
+
+def record(name: str, duration: float) -> None:
+    if (trace := _current_trace.get()) is not None:
+        trace.record(name, duration)
+
+
+def traced(name: str):
+    """Decorate a coroutine function so that each call is recorded as a span"""
+
+    def decorator(fn: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        @functools.wraps(fn)
+        async def wrapper(*args: Any, **kwargs: Any) -> T:
+            with span(name):
+                return await fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def report_if_slow(
+    trace: Trace, user: discord.Member | discord.User | None = None
+) -> None:
+    """Log a breakdown of the trace if it took longer than the threshold"""
+    if trace.duration < config.SLOW_COMMAND_THRESHOLD:
+        return
+
+    logging.getLogger("ProjectHyperlink").warning(
+        f"Slow command `{trace.name}` took {trace.duration * 1000:.0f}ms",
+        extra={"fields": trace.breakdown(), "user": user},
+    )
+
+
+def instrument_http(trace_config: aiohttp.TraceConfig) -> aiohttp.TraceConfig:
+    """Add HTTP request spans to an existing trace config"""
+
+    async def on_request_start(_, context, params: aiohttp.TraceRequestStartParams):
+        context.span_start = time.perf_counter()
+
+    async def on_request_done(_, context, params):
+        record(
+            f"http: {params.method} {params.url.host}{metrics.normalize_endpoint(params.url.path)}",
+            time.perf_counter() - context.span_start,
+        )
+
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_request_end.append(on_request_done)
+    trace_config.on_request_exception.append(on_request_done)
+    return trace_config
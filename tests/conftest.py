@@ -0,0 +1,10 @@
+import os
+import pathlib
+import sys
+
+# The bot runs from `src`, so its modules import each other from there
+sys.path.insert(0, str(pathlib.Path(__file__).parent.parent / "src"))
+
+# `config` insists on a token, which nothing under test uses
+os.environ.setdefault("BOT_TOKEN", "test")
+os.environ.setdefault("TESTING_MODE", "1")
@@ -0,0 +1,129 @@
+"""In-memory stand-ins for Google Drive and the database pool."""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import itertools
+import re
+from typing import Any
+
+from drive.client import FOLDER_MIME_TYPE
+
+
+def file(id: str, name: str, parent: str, *, folder: bool = False) -> dict[str, Any]:
+    return {
+        "id": id,
+        "name": name,
+        "parents": [parent],
+        "mimeType": FOLDER_MIME_TYPE if folder else "application/pdf",
+        "webViewLink": f"https://drive.google.com/file/d/{id}/view",
+    }
+
+
+class FakeDrive:
+    """Answers the `GoogleDrive` calls the bot makes from a dict of files.
+
+    Changes are queued for `list_changes` by `change`, and uploads are kept
+    whole, so tests can check what arrived.
+    """
+
+    def __init__(self, files: list[dict[str, Any]]):
+        self.files = {f["id"]: f for f in files}
+        self.token = 1
+        self.changes: list[dict[str, Any]] = []
+        self.contents: dict[str, bytes] = {}
+        self._uploads: dict[str, tuple[str, str, bytearray]] = {}
+        self._ids = itertools.count(1)
+
+    async def get_item(self, id: str) -> dict[str, Any]:
+        return self.files[id]
+
+    async def list_items(self, query: str) -> list[dict[str, Any]]:
+        parents = set(re.findall(r"'([^']+)' in parents", query))
+        return [
+            f
+            for f in self.files.values()
+            if parents.intersection(f.get("parents", [])) and not f.get("trashed")
+        ]
+
+    async def get_start_page_token(self) -> str:
+        return str(self.token)
+
+    async def list_changes(self, page_token: str) -> tuple[list[dict[str, Any]], str]:
+        changes, self.changes = self.changes, []
+        self.token += 1
+        return changes, str(self.token)
+
+    def change(self, id: str, **fields: Any) -> None:
+        self.files[id] = {**self.files[id], **fields}
+        self.changes.append({"fileId": id, "file": self.files[id]})
+
+    async def create_folder(self, name: str, parent_id: str) -> dict[str, Any]:
+        folder = file(f"new-{next(self._ids)}", name, parent_id, folder=True)
+        self.files[folder["id"]] = folder
+        return folder
+
+    async def rename(self, id: str, name: str) -> dict[str, Any]:
+        self.change(id, name=name)
+        return self.files[id]
+
+    async def start_upload(
+        self, name: str, parent_id: str, mime_type: str, size: int
+    ) -> str:
+        session_url = f"upload-{next(self._ids)}"
+        self._uploads[session_url] = (name, parent_id, bytearray())
+        return session_url
+
+    async def upload_chunk(
+        self, session_url: str, chunk: bytes, offset: int, size: int
+    ) -> tuple[int, dict[str, Any] | None]:
+        name, parent_id, data = self._uploads[session_url]
+        data[offset:] = chunk
+        if len(data) < size:
+            return len(data), None
+
+        uploaded = file(f"new-{next(self._ids)}", name, parent_id)
+        uploaded["md5Checksum"] = hashlib.md5(data).hexdigest()
+        self.files[uploaded["id"]] = uploaded
+        self.contents[uploaded["id"]] = bytes(data)
+        return size, uploaded
+
+    async def upload_status(
+        self, session_url: str, size: int
+    ) -> tuple[int, dict[str, Any] | None]:
+        return len(self._uploads[session_url][2]), None
+
+
+class FakeConnection:
+    """Keeps what `DriveIndex` saves, in place of the `drive_item` table"""
+
+    def __init__(self):
+        self.rows: dict[str, tuple] = {}
+        self.page_token: str | None = None
+
+    @contextlib.asynccontextmanager
+    async def transaction(self):
+        yield
+
+    async def executemany(self, query: str, rows: list[tuple]) -> None:
+        for row in rows:
+            self.rows[row[0]] = row
+
+    async def execute(self, query: str, *args: Any) -> None:
+        if query.startswith("DELETE FROM drive_item WHERE"):
+            for id in args[0]:
+                self.rows.pop(id, None)
+        elif query.startswith("DELETE FROM drive_item"):
+            self.rows.clear()
+        else:
+            self.page_token = args[0]
+
+
+class FakePool:
+    def __init__(self):
+        self.connection = FakeConnection()
+
+    @contextlib.asynccontextmanager
+    async def acquire(self):
+        yield self.connection
@@ -0,0 +1,58 @@
+"""`DriveIndex` against an in-memory Drive, and a stand-in for its tables."""
+
+from __future__ import annotations
+
+import asyncio
+
+from drive.index import DriveIndex
+from fakes import FakeDrive, FakePool, file
+
+NOTES, PAPERS = "notes", "papers"
+
+
+def test_bootstrap_then_rename_move_and_trash():
+    drive = FakeDrive(
+        [
+            file(NOTES, "Notes", "root", folder=True),
+            file(PAPERS, "Past Papers", "root", folder=True),
+            file("cs", "CS", NOTES, folder=True),
+            file("dbms", "DBMS Unit 1.pdf", "cs"),
+            file("os", "OS Unit 2.pdf", NOTES),
+            file("old", "Old", NOTES, folder=True),
+            file("stale", "Stale Notes.pdf", "old"),
+            file("outside", "Elsewhere.pdf", "root"),
+        ]
+    )
+    pool = FakePool()
+    index = DriveIndex(pool, drive, (NOTES, PAPERS))  # type: ignore
+
+    async def run() -> int:
+        await index.bootstrap()
+        assert set(index.items) == {NOTES, PAPERS, "cs", "dbms", "os", "old", "stale"}
+        assert pool.connection.rows.keys() == index.items.keys()
+        assert pool.connection.page_token == "1"
+
+        drive.change("os", name="Operating Systems Unit 2.pdf")
+        drive.change("dbms", parents=[PAPERS])
+        drive.change("old", trashed=True)
+        return await index.sync()
+
+    # The rename and the move are upserted, the trashed folder takes its file
+    assert asyncio.run(run()) == 4
+
+    assert index.get("os").name == "Operating Systems Unit 2.pdf"
+    assert [item.id for item in index.search("operating")] == ["os"]
+    assert index.search("stale") == []
+
+    assert index.get("dbms").parents == [PAPERS]
+    assert index.children["cs"] == set()
+    assert "dbms" in index.children[PAPERS]
+
+    assert index.get("old") is None and index.get("stale") is None
+    assert "old" not in index.children[NOTES]
+
+    rows = pool.connection.rows
+    assert rows.keys() == index.items.keys()
+    assert rows["os"][1] == "Operating Systems Unit 2.pdf"
+    assert rows["dbms"][2] == [PAPERS]
+    assert pool.connection.page_token == index.page_token == "2"
@@ -0,0 +1,71 @@
+"""Ingesting a zip archive of past papers into an in-memory Drive."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import io
+import zipfile
+
+from drive import ingest
+from drive.client import GoogleDrive
+from drive.folders import FolderResolver
+from drive.index import DriveIndex
+from fakes import FakeDrive, FakePool, file
+
+PAPERS = {
+    "cs-201_endsem_May 2022.PDF": b"%PDF endsem",
+    "midsem/CS201 midsem 2021.pdf": b"%PDF midsem",
+    "notes.txt": b"not a paper",
+}
+
+
+def test_execute_uploads_papers_from_a_zip(tmp_path):
+    archive = tmp_path / "papers.zip"
+    with zipfile.ZipFile(archive, "w") as zip:
+        for name, data in PAPERS.items():
+            zip.writestr(name, data)
+
+    root, past_papers = GoogleDrive.root, GoogleDrive.past_papers
+    drive = FakeDrive(
+        [
+            file(root, "Notes", "drive", folder=True),
+            file(past_papers, "Past Papers", "drive", folder=True),
+            file("ds", "CS-201 Data Structures", past_papers, folder=True),
+        ]
+    )
+    index = DriveIndex(FakePool(), drive, (root, past_papers))  # type: ignore
+
+    async def run() -> ingest.IngestResult:
+        await index.bootstrap()
+        index.ready.set()
+        # The archive is only closed once every paper has been read back
+        with archive.open("rb") as source:
+            papers = await asyncio.to_thread(ingest.read_zip, source)
+            plan = ingest.plan(index, papers)
+            assert [u.destination for u in plan.uploads] == [
+                "CS-201/CS-201 endsem 2022.pdf",
+                "CS201/midsem/CS201 midsem 2021.pdf",
+            ]
+            resolver = FolderResolver(drive, index)  # type: ignore
+            return await ingest.execute(plan, drive, index, resolver)  # type: ignore
+
+    result = asyncio.run(run())
+    assert result.failed == []
+
+    uploaded = {item.name: item for item in result.uploaded}
+    assert uploaded.keys() == {"CS-201 endsem 2022.pdf", "CS201 midsem 2021.pdf"}
+    endsem, midsem = uploaded.values()
+    assert endsem.parents == ["ds"]
+    assert drive.contents[endsem.id] == PAPERS["cs-201_endsem_May 2022.PDF"]
+    assert drive.contents[midsem.id] == PAPERS["midsem/CS201 midsem 2021.pdf"]
+    assert midsem.md5 == hashlib.md5(PAPERS["midsem/CS201 midsem 2021.pdf"]).hexdigest()
+
+    # The second course code is written differently, so it gets its own folder
+    midsem_folder = index.get(midsem.parents[0])
+    assert midsem_folder.name == "midsem"
+    assert index.get(midsem_folder.parents[0]).name == "CS201"
+
+    # Ingesting the same archive again finds every paper already there
+    again = ingest.plan(index, [*ingest.read_zip(io.BytesIO(archive.read_bytes()))])
+    assert again.uploads == []